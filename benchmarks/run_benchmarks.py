@@ -0,0 +1,263 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+
+import numpy as np
+import pandas as pd
+
+from utils import (METHOD_VARIANTS, METHODS, TUNING_METHODS, ModelArray, PID_Object, TuningRequest,
+                   calculate_pid_batch, estimate_dead_time, find_steps, get_data, optimization_cache, step_input,
+                   step_response, tuning_cache)
+from utils import Data_Loader
+from utils.Identification import guess_model
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = [10_000, 1_000_000, 10_000_000]  # rows of the synthetic historian files
+PARSE_OPTIONS = (";", ",", 1, 1, 0, "%d.%m.%Y %H:%M:%S")  # separator, decimal, header row, skip rows/columns, format
+MV, PV = "x", "y_e"
+INTERVAL = 1.0  # [s] between samples
+WRITE_ROWS = 1_000_000  # rows formatted per .csv write
+REPEAT = 5  # runs per measurement, the fastest and the median are reported
+SCALAR_CALLS = 1000  # PID_Object calls per scalar run, the time reported is per call
+BATCH_MODELS = 100_000  # models per calculate_pid_batch call
+OPTIMIZED_MODELS = 2  # the Optimized method tunes model by model, so its runs are kept short
+MODEL = {"k_ob": 2.0, "tau_ob": 30.0, "t1_ob": 5.0, "t2_ob": 2.0}  # synthetic plant, fast enough for guess_model
+SLOWDOWN = 1.2  # measurements at least this many times slower than the baseline are reported by --compare
+
+
+def synthetic_frame(begin, rows, total, seed=0):
+    """
+    Rows [begin, begin + rows) of a synthetic record of `total` rows in the demo.csv layout: MV `x` steps
+    0 -> 10 -> 5 -> 10 at 10%, 40% and 70% of the record, PV `y_e` is the 1st order response of MODEL with noise,
+    `y_e2` / `x1` a 2nd order loop and `T14503` a slow unrelated signal.
+    """
+    rng = np.random.default_rng(seed + begin)
+    t = (begin + np.arange(rows)) * INTERVAL
+    steps = [(0.1 * total * INTERVAL, 10.0), (0.4 * total * INTERVAL, -5.0), (0.7 * total * INTERVAL, 5.0)]
+    mv = sum(step_input(t, dx, t0) for t0, dx in steps)
+    pv = sum(step_response(t - t0, "1st Order", MODEL["k_ob"], MODEL["tau_ob"], MODEL["t1_ob"], dx=dx)
+             for t0, dx in steps)
+    pv2 = sum(step_response(t - t0, "2nd Order T1 != T2", MODEL["k_ob"], MODEL["tau_ob"], MODEL["t1_ob"],
+                            MODEL["t2_ob"], dx=dx) for t0, dx in steps)
+    noise = 0.005 * MODEL["k_ob"] * 10
+    return pd.DataFrame({"datetime": pd.Timestamp("2025-07-12 11:59:50") + pd.to_timedelta(t, unit="s"),
+                         "time": t.astype(np.int64),
+                         "y_e": pv + noise * rng.standard_normal(rows),
+                         "T14503": 20 + 0.5 * np.sin(t / 3600) + noise * rng.standard_normal(rows),
+                         "x": mv,
+                         "y_e2": 1 + pv2 + noise * rng.standard_normal(rows),
+                         "x1": 1 + mv})
+
+
+def write_csv(path, rows, seed=0):
+    """
+    Synthetic historian .csv of `rows` rows in the demo.csv layout: a junk line, the header, a tag line,
+    then data with ';' separator, ',' decimal and %d.%m.%Y %H:%M:%S timestamps.
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", newline="") as file:
+        file.write("sdfsd;sdf;aasd;ww;hfh;hftrw;mmm\n")
+        file.write("datetime;time;y_e;T14503;x;y_e2;x1\n")
+        file.write("asca;t;cv;cv2;mv;cv1;mv1\n")
+        for begin in range(0, rows, WRITE_ROWS):
+            frame = synthetic_frame(begin, min(WRITE_ROWS, rows - begin), rows, seed)
+            frame.to_csv(file, sep=";", decimal=",", header=False, index=False, float_format="%.4f",
+                         date_format="%d.%m.%Y %H:%M:%S")
+    os.replace(temp_path, path)
+
+
+def dataset(data_dir, rows):
+    """
+    Path of the synthetic file with `rows` rows, generated on first use and reused afterwards.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic_{rows}.csv")
+    if not os.path.exists(path):
+        begin = time.perf_counter()
+        write_csv(path, rows)
+        print(f"generated {path} in {time.perf_counter() - begin:.1f} s", flush=True)
+    return path
+
+
+def measure(func, repeat=REPEAT, setup=None, number=1):
+    """
+    Fastest and median wall time [s] per call over `repeat` runs of `number` calls of `func`;
+    `setup` runs untimed before each run.
+    """
+    seconds = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        begin = time.perf_counter()
+        for _ in range(number):
+            func()
+        seconds.append((time.perf_counter() - begin) / number)
+    return {"min": min(seconds), "median": float(np.median(seconds)), "repeat": repeat, "number": number}
+
+
+def bench_data(path, rows, repeat, cache_dir):
+    """
+    get_data parsing the .csv, from the Feather disk cache and from memory, then step detection and
+    the model curve of the PID Tuner page on the loaded record.
+    """
+    def cold():
+        Data_Loader.frame_cache.clear()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    def load():
+        return get_data(path, *PARSE_OPTIONS)
+
+    results = [("get_data/parse", measure(load, repeat, cold)),
+               ("get_data/disk_cache", measure(load, repeat, Data_Loader.frame_cache.clear)),
+               ("get_data/memory_cache", measure(load, repeat))]
+
+    data = load()
+    t = (data.index - data.index[0]).total_seconds().to_numpy()
+    mv, pv = data[MV].to_numpy(dtype=float), data[PV].to_numpy(dtype=float)
+    dx, t_step, tau_ob, t1_ob = guess_model(t, mv, pv)
+    results += [("step_detection/guess_model", measure(lambda: guess_model(t, mv, pv), repeat)),
+                ("step_detection/find_steps", measure(lambda: find_steps(mv, 0.5 * dx), repeat)),
+                ("step_detection/estimate_dead_time", measure(lambda: estimate_dead_time(mv, pv, INTERVAL), repeat))]
+
+    for order in ("1st Order", "2nd Order T1 != T2", "2nd Order T1 = T2"):
+        def curve():  # as model_curve of the PID Tuner page
+            grid = np.arange(len(data)) * INTERVAL
+            return pd.DataFrame({"ΔMV": step_input(grid, dx, t_step),
+                                 "model": step_response(grid - t_step, order, MODEL["k_ob"], tau_ob, t1_ob,
+                                                        MODEL["t2_ob"], dx=dx, y0=0.0)},
+                                index=pd.to_timedelta(grid, unit="s") + data.index[0])
+        results.append((f"model_curve/{order}", measure(curve, repeat)))
+    return [{"name": name, "rows": rows, **timing} for name, timing in results]
+
+
+def bench_methods(repeat, batch_models, seed=0):
+    """
+    Every method, PID type and variant: PID_Object settings of one model (the method formulas only, the tuning
+    cache is bypassed) and calculate_pid_batch over `batch_models` random models (ModelArray.tune, model by model,
+    for methods without a vectorized formula).
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    for (order, pid), methods in METHODS.items():
+        t2_ob = MODEL["t2_ob"] if order != "1st Order" else None
+        for method in methods:
+            vectorized = TUNING_METHODS[method].formula is not None
+            size = batch_models if vectorized else OPTIMIZED_MODELS
+            models = ModelArray(order, rng.uniform(0.5, 5, size), rng.uniform(5, 60, size), rng.uniform(20, 200, size),
+                                None if t2_ob is None else rng.uniform(1, 15, size))
+            for variant in METHOD_VARIANTS.get(method, [{}]):
+                request = TuningRequest(order, MODEL["k_ob"], MODEL["tau_ob"], 4 * MODEL["t1_ob"], t2_ob, pid, method,
+                                        **variant)
+                entry = {"order": order, "pid": "PID" if pid else "PI", "method": method,
+                         "variant": ", ".join(f"{key}={value}" for key, value in variant.items())}
+                name = "/".join(value for value in entry.values() if value)
+
+                def scalar():
+                    PID_Object.from_request(request).settings()
+
+                def batch():
+                    if vectorized:
+                        calculate_pid_batch(method, order, *models.columns(), pid, lamb=3.0, **variant)
+                    else:
+                        models.tune(method, pid, **variant)
+
+                def clear():
+                    tuning_cache.clear()
+                    optimization_cache.clear()
+
+                runs = repeat if vectorized else 1
+                results.append({"name": f"pid_scalar/{name}", "models": 1, **entry,
+                                **measure(scalar, runs, clear, SCALAR_CALLS if vectorized else 1)})
+                results.append({"name": f"pid_batch/{name}", "models": size, **entry,
+                                **measure(batch, runs, clear)})
+    return results
+
+
+def environment():
+    def package(name):
+        try:
+            return version(name)
+        except PackageNotFoundError:
+            return None
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "packages": {name: package(name) for name in ("numpy", "pandas", "pyarrow", "streamlit", "altair")}}
+
+
+def compare(results, baseline, threshold=SLOWDOWN):
+    """
+    Measurements (matched by name and size) whose fastest time grew at least `threshold` times against the
+    baseline results; returns rows (name, size, baseline [s], current [s], ratio), slowest first.
+    """
+    def key(result):
+        return result["name"], result.get("rows", result.get("models"))
+
+    before = {key(result): result["min"] for result in baseline["results"]}
+    rows = [(*key(result), before[key(result)], result["min"], result["min"] / before[key(result)])
+            for result in results["results"] if before.get(key(result))]
+    return sorted((row for row in rows if row[4] >= threshold), key=lambda row: -row[4])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time data loading, step detection, model curves and every tuning method on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=SIZES, help="sizes of the synthetic .csv files")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "benchmarks", "data"),
+                        help="folder for the synthetic .csv files (generated once, then reused)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per measurement")
+    parser.add_argument("--batch-models", type=int, default=BATCH_MODELS, help="models per batched tuning call")
+    parser.add_argument("--skip-data", action="store_true", help="only time the tuning methods")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="results (.json)")
+    parser.add_argument("--compare", help="earlier results (.json) to report slowdowns against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    if not args.skip_data:
+        cache_dir = tempfile.mkdtemp(prefix="pid_benchmark_")
+        Data_Loader.CACHE_DIR = cache_dir  # keep the user's .pid_cache out of the measurements
+        try:
+            for rows in args.rows:
+                results += bench_data(dataset(args.data_dir, rows), rows, args.repeat, cache_dir)
+                Data_Loader.frame_cache.clear()
+                print(f"data benchmarks done for {rows} rows", flush=True)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    results += bench_methods(args.repeat, args.batch_models)
+    print("tuning method benchmarks done", flush=True)
+
+    report = {"environment": environment(), "results": results}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=1, ensure_ascii=False)
+    print(f"{len(results)} measurements saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            slower = compare(report, json.load(file))
+        for name, size, before, after, ratio in slower:
+            print(f"{ratio:5.2f}x slower  {name} ({size}): {before:.6f} s -> {after:.6f} s")
+        print(f"{len(slower)} measurements at least {SLOWDOWN}x slower than {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
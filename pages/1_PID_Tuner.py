@@ -1,9 +1,20 @@
+import altair as alt
 import streamlit as st
 import numpy as np
 import pandas as pd
 import os
 import datetime
-from utils import PID_Object
+from contextlib import contextmanager
+from time import perf_counter
+from utils import (CHART_POINTS, CRITERIA, FILTER_WINDOW, FILTERS, INDICES, METHODS, MS_LIMIT, OPTION_MENUS,
+                   TUNING_METHODS, PID_Object, chart_positions, compare_methods, estimate_dead_time, fit_model,
+                   frame_stats, frequency_response, get_data, identify_steps, loop_margins, preprocess, read_columns,
+                   read_window, robustness_analysis, sample_interval, simulate, step_input, step_response,
+                   summarize_robustness, summarize_steps, tuning_cache)
+
+NYQUIST_RADIUS = 4  # open loop points further than this from the origin are left out of the Nyquist plot
+
+DEAD_TIME_CONFIDENCE = 0.7  # cross-correlation dead time estimates at least this confident seed the τob slider
 
 
 def custom_slider(label, min_value, max_value, step=0.1, default=None):
@@ -58,35 +69,161 @@ def custom_slider(label, min_value, max_value, step=0.1, default=None):
     return st.session_state[state_key]
 
 
-def get_data(file_name, separator, decimal_sep, header_row, skip_rows, skip_columns, dateparse):
-    if skip_rows | skip_columns:
-        ncols = len(pd.read_csv(file_name, sep=separator, decimal=decimal_sep, nrows=1).columns)
-        if dateparse:
-            return pd.read_csv(file_name,
-                               sep=separator,
-                               decimal=decimal_sep,
-                               header=header_row,
-                               index_col=0,
-                               usecols=range(skip_columns, ncols),
-                               skiprows=range(header_row + 1, header_row + skip_rows + 1),
-                               parse_dates=['datetime'],
-                               date_parser=dateparse
-                               )
-        else:
-            return pd.read_csv(file_name,
-                               sep=separator,
-                               decimal=decimal_sep,
-                               header=header_row,
-                               usecols=range(skip_columns, ncols),
-                               skiprows=range(header_row + 1, header_row + skip_rows + 1)
-                               )
-    else:
-        return pd.read_csv(file_name,
-                           sep=separator,
-                           decimal=decimal_sep,
-                           header=header_row,
-                           index_col=0
-                           )
+def load_data(large_file, source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format):
+    """
+    Whole file for uploads; for large files only the chosen MV/PV columns
+    within a time range or a window around the MV step are streamed in.
+    """
+    if not large_file:
+        return get_data(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format)
+
+    columns = read_columns(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format)
+    col1, col2 = st.columns(2)
+    with col1:
+        mv = st.selectbox("MV column to load", columns)
+    with col2:
+        pv = st.selectbox("PV column to load", columns, index=min(1, len(columns) - 1))
+    if date_format and st.checkbox("Load time range"):
+        col1, col2 = st.columns(2)
+        with col1:
+            range_start = st.text_input("From", placeholder="2025-07-12 12:00:00") or None
+        with col2:
+            range_end = st.text_input("To", placeholder="2025-07-12 18:00:00") or None
+        return read_window(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format, [mv, pv],
+                           start=range_start, end=range_end)
+
+    unit = "s" if date_format else "rows"
+    col1, col2 = st.columns(2)
+    with col1:
+        before = st.number_input(f"Keep before MV step ({unit})", min_value=0, value=600, step=60)
+    with col2:
+        after = st.number_input(f"Keep after MV step ({unit})", min_value=1, value=3600, step=60)
+    return read_window(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format, [mv, pv],
+                       before=before, after=after)
+
+
+@contextmanager
+def stage(name):
+    """
+    Add the run time of the block to the page stage timings.
+    """
+    begin = perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + perf_counter() - begin
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def detect_step(mv, pv, dx, pv_low, pv_high):
+    """
+    MV step time and heuristic model guesses (K, τ, T) for a step of `dx`: MV step where ΔMV >= 0.5 dx,
+    dead time until ΔPV >= 0.1 of the PV range (or, on finely resampled data without such jumps, until PV has
+    moved by 0.1 of the range), time constant until PV reaches 63.2% of its maximum.
+    """
+    mv_start = mv.index[mv.diff() >= 0.5 * dx][0]
+    jumps = pv.diff() >= (pv_high - pv_low) * 0.1
+    if not jumps.any():
+        jumps = (pv - pv.iloc[0]).abs() >= (pv_high - pv_low) * 0.1
+    pv_start = pv.index[jumps][0]
+    k_ob = (pv_high - pv_low) * 1.0 / dx
+    tau_ob = int((pv_start - mv_start).total_seconds())
+    t1_ob = int((pv.index[pv >= 0.632 * pv_high][0] - pv_start).total_seconds())
+    return mv_start, k_ob, tau_ob, t1_ob
+
+
+@st.cache_data(max_entries=8, show_spinner="Preprocessing...")
+def preprocess_data(data, mv, pv, interval, method, window, clip):
+    return preprocess(data, mv, pv, interval, method, window, clip)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def dead_time(mv, pv, freq):
+    return estimate_dead_time(mv.to_numpy(dtype=float), pv.to_numpy(dtype=float), freq)
+
+
+@st.cache_data(max_entries=16, show_spinner="Fitting model...")
+def fit_step(order, pv, freq, dx, t_step, tau_ob, t1_ob, y0):
+    t = np.arange(len(pv)) * freq
+    return fit_model(t, pv.to_numpy(dtype=float), order, dx, tau_ob, t1_ob, t0=t_step, y0=y0)
+
+
+def fit_defaults(order, pv, freq, dx, t_step, k_ob, tau_ob, t1_ob, y0):
+    """
+    Slider defaults from least-squares model fit, started from the heuristic guesses.
+    """
+    fit = fit_step(order, pv, freq, dx, t_step, tau_ob, t1_ob, y0)
+    st.caption(f"Least-squares fit: R² = {round(fit.r2, 4)}, RMSE = {round(fit.rmse, 4)}")
+    t1_ob = max(1, round(fit.t1_ob))
+    t2_ob = None
+    if fit.t2_ob is not None:
+        t2_ob = max(1, round(fit.t2_ob))
+        t2_ob = t2_ob if t2_ob != t1_ob else t1_ob + 1
+    return fit.k_ob, max(1, round(fit.tau_ob)), t1_ob, t2_ob
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def model_curve(n, freq, start, order, t_step, dx, y0, k_ob, tau_ob, t1_ob, t2_ob=None):
+    """
+    ΔMV step and model response on the time grid of the data.
+    """
+    t = np.arange(n) * freq
+    return pd.DataFrame({'ΔMV': step_input(t, dx, t_step),
+                         'model': step_response(t - t_step, order, k_ob, tau_ob, t1_ob, t2_ob, dx=dx, y0=y0)},
+                        index=pd.to_timedelta(t, unit='s') + start)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def closed_loop(order, k_ob, tau_ob, t1_ob, t2_ob, p, i, d):
+    return simulate(PID_Object(order, k_ob, tau_ob, t1_ob, t2_ob), p, i, d)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def open_loop_response(order, k_ob, tau_ob, t1_ob, t2_ob, p, i, d):
+    obj = PID_Object(order, k_ob, tau_ob, t1_ob, t2_ob)
+    return loop_margins(obj, p, i, d), frequency_response(obj, p, i, d)
+
+
+@st.cache_data(max_entries=8, show_spinner="Identifying steps...")
+def identify_all_steps(mv, pv, order):
+    t = (mv.index - mv.index[0]).total_seconds().to_numpy()
+    steps = identify_steps(t, mv.to_numpy(dtype=float), pv.to_numpy(dtype=float), order)
+    steps.insert(0, "step", mv.index[0] + pd.to_timedelta(steps.pop("step_time"), unit="s"))
+    return steps
+
+
+@st.cache_data(max_entries=32, show_spinner="Comparing methods...")
+def compare_all_methods(order, k_ob, tau_ob, t1_ob, t2_ob, pid, rank_by):
+    return compare_methods(order, k_ob, tau_ob, t1_ob, t2_ob, pid, rank_by=rank_by, workers=None)
+
+
+@st.cache_data(max_entries=8, show_spinner="Running Monte Carlo...")
+def robustness(method, order, k_ob, tau_ob, t1_ob, t2_ob, pid, overshoot, disturbance, lamb, uncertainty, samples):
+    return robustness_analysis(method, order, k_ob, tau_ob, t1_ob, t2_ob, pid, overshoot or 0, disturbance or 0, lamb,
+                               uncertainty, samples, seed=0, workers=None)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def chart_rows(series, begin, end):
+    return chart_positions(series.to_numpy(dtype=float), begin=begin, end=end)
+
+
+def chart_window(index, label):
+    """
+    (begin, end) row range of the chart; long records get a time window slider to zoom in at full detail.
+    """
+    if len(index) <= CHART_POINTS:
+        return 0, len(index)
+    first, last = index[0].to_pydatetime(), index[-1].to_pydatetime()
+    low, high = st.slider(label, first, last, (first, last), step=datetime.timedelta(seconds=int(freq)))
+    return index.searchsorted(low), index.searchsorted(high, side="right")
+
+
+def preferred(options, best):
+    """
+    Index of the first option that is part of the best-ranked method row (0 if none is).
+    """
+    return next((index for index, option in enumerate(options) if option in best), 0)
 
 
 st.set_page_config(
@@ -94,16 +231,20 @@ st.set_page_config(
 )
 
 st.write("# PID Tuner")
+timings = {}  # stage: seconds spent in this run
 st.write("## Data Loading")
 
-if st.checkbox("My file more than 200 Mb"):  # Check .csv files in root directory
+large_file = st.checkbox("My file more than 200 Mb")
+if large_file:  # Check .csv files in root directory
     st.write("Upload your file in root directory")
     csv_files = [f for f in os.listdir('.') if f.endswith('.csv')]
     file_name = st.selectbox("Choose data file", csv_files, index=None)
+    source = file_name
     st.write("*Press 'R' to update file list*")
 else:
     try:
-        file_name = st.file_uploader("Upload your .csv data file").name
+        source = st.file_uploader("Upload your .csv data file")
+        file_name = source.name
         if not file_name.endswith(".csv"):
             raise ValueError
     except AttributeError:
@@ -151,7 +292,8 @@ date_format = st.selectbox("Datetime format:",
                            )
 try:
     if st.checkbox('No "datetime" column'):
-        data = get_data(file_name, separator, decimal_sep, header_row, skip_rows, skip_columns, None)
+        with stage("load"):
+            data = load_data(large_file, source, separator, decimal_sep, header_row, skip_rows, skip_columns, None)
         col1, col2, col3 = st.columns(3)
         with col1:
             freq = st.number_input("Set time interval (s)", step=1, min_value=1)
@@ -170,9 +312,10 @@ try:
         if st.checkbox('Data preview'):
             st.dataframe(data.head())
     else:
-        dateparse = lambda x: datetime.datetime.strptime(x, date_format)
-        data = get_data(file_name, separator, decimal_sep, header_row, skip_rows, skip_columns, dateparse)
-        freq = int((pd.Timestamp(data.index[1]) - pd.Timestamp(data.index[0])).total_seconds())
+        with stage("load"):
+            data = load_data(large_file, source, separator, decimal_sep, header_row, skip_rows, skip_columns,
+                             date_format)
+            freq = data.attrs["interval"] or sample_interval(data.index)
         start = data.index[0]
         if st.checkbox('Data preview'):
             st.dataframe(data.head())
@@ -190,6 +333,12 @@ except ValueError:
         st.stop()
     st.error("Check Datetime or choose 'No Datetime Column'")
     st.stop()
+except IndexError:
+    st.error("MV step not found. Check MV column or load time range")
+    st.stop()
+except TypeError:
+    st.error("Check Header row or separators")
+    st.stop()
 except NameError:
     st.error("Data error")
     st.stop()
@@ -198,69 +347,92 @@ except NameError:
 st.write("## Model Fitting")
 try:
     manipulated_variable = st.selectbox("Choose manipulated variable (MV)", list(data.columns))
-    process_variable = st.selectbox("Choose process variable (PV)", list(data.columns))
-    if str(data[manipulated_variable][0]).lower() in ["none", "nan"] or str(data[process_variable][0]).lower() in \
-            ["none", "nan"]:
+    process_variable = st.selectbox("Choose process variable (PV)", list(data.columns),
+                                    index=min(1, len(data.columns) - 1) if large_file else 0)
+    stats = frame_stats(data).reindex([manipulated_variable, process_variable])
+    if (stats["first_valid"] != 0).any():  # text column or missing first value
         raise ValueError
+    if st.checkbox("Preprocess data (resample, filter, clip outliers)"):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            interval = st.number_input("Resample interval (s)", min_value=0, value=int(freq), step=1,
+                                       help="0 keeps the original samples")
+        with col2:
+            method = st.selectbox("PV filter", FILTERS)
+        with col3:
+            window = st.number_input("Filter window (samples)", min_value=1, value=FILTER_WINDOW, step=2)
+        with col4:
+            clip = st.number_input("Clip outliers at (robust deviations)", min_value=0.0, value=0.0, step=0.5,
+                                   help="0 turns clipping off")
+        with stage("preprocess"):
+            data = preprocess_data(data, manipulated_variable, process_variable, interval, method, window, clip)
+        freq = interval or freq
+        start = data.index[0]
+        stats = frame_stats(data).reindex([manipulated_variable, process_variable])
     if st.checkbox("Show linechart"):
-        st.line_chart(data=data, x=None, y=[process_variable, manipulated_variable], color=["#f00", "#00f"])
+        window = chart_window(data.index, "Linechart window")
+        with stage("render"):
+            rows = chart_rows(data[[process_variable, manipulated_variable]], *window)
+            st.line_chart(data=data.iloc[rows], x=None, y=[process_variable, manipulated_variable],
+                          color=["#f00", "#00f"])
     order = st.selectbox(
         "Choose model", ["1st Order",
                          "2nd Order T1 != T2"]
     )
+    auto_fit = st.checkbox("Fit model automatically (least squares)")
+    if st.checkbox("Identify every MV step in the record"):
+        with stage("detect"):
+            steps = identify_all_steps(data[manipulated_variable], data[process_variable], order)
+        st.write(f"Steps found: {len(steps)}")
+        st.dataframe(steps)
+        st.write("Model parameters spread")
+        st.dataframe(summarize_steps(steps))
+
+    (mv_low, mv_high), (pv_low, pv_high) = stats[["min", "max"]].to_numpy(dtype=float)
+    dx_cur = (mv_high - mv_low) * 1.0
+    dx = custom_slider('ΔMV', mv_low - dx_cur, mv_high + dx_cur, default=dx_cur)
+    with stage("detect"):
+        mv_start, k_ob_cur, tau_ob_cur, tob_1_cur = detect_step(data[manipulated_variable], data[process_variable], dx,
+                                                                pv_low, pv_high)
+        tau_estimate, confidence = dead_time(data[manipulated_variable], data[process_variable], freq)
+    st.caption(f"Cross-correlation dead time: {round(tau_estimate, 1)} s, confidence {round(confidence, 2)}")
+    if confidence >= DEAD_TIME_CONFIDENCE:
+        tau_ob_cur = max(1, round(tau_estimate))
+    t_step = (mv_start - start).total_seconds()
 
-    t = list(range(0, len(data)*freq, freq))
     if not order:
         st.error("Please select model.")
     elif order == "1st Order":
-        dx_cur = (max(data[manipulated_variable]) - min(data[manipulated_variable])) * 1.0
-        dx = custom_slider('ΔMV', min(data[manipulated_variable]) - dx_cur, max(data[manipulated_variable]) + dx_cur,
-                            default=dx_cur)
-
-        k_ob_cur = (max(data[process_variable]) - min(data[process_variable])) * 1.0 / dx
-        k_ob = custom_slider('Kob', min(data[process_variable]) - k_ob_cur,
-                         max(data[process_variable]) + k_ob_cur,
-                         default=k_ob_cur)
-
-        mv_start = data[data[manipulated_variable].diff() >= 0.5 * dx].index[0]
-        pv_start = data[data[process_variable].diff() >= (max(data[process_variable]) - min(data[process_variable]))
-                        * 0.1].index[0]
-
-        tau_ob_cur = int((pv_start - mv_start).total_seconds())
+        if auto_fit:
+            with stage("model"):
+                k_ob_cur, tau_ob_cur, tob_1_cur, _ = fit_defaults(order, data[process_variable], freq, dx, t_step,
+                                                                  k_ob_cur, tau_ob_cur, tob_1_cur, pv_low)
+
+        k_ob = custom_slider('Kob', pv_low - k_ob_cur,
+                             pv_high + k_ob_cur,
+                             default=k_ob_cur)
         tau_ob = custom_slider('τob', 0, tau_ob_cur * 3, step=1, default=tau_ob_cur)
-
-        tob_1_cur = int((data[data[process_variable] >= 0.632 *
-                              max(data[process_variable])].index[0] - pv_start).total_seconds())
-
         t1_ob = custom_slider('Tob', 0, 3 * tob_1_cur, step=1, default=tob_1_cur)
 
         obj = PID_Object(order, k_ob, tau_ob, t1_ob)
 
-        first_order = lambda i: k_ob * (1 - np.exp(-(i - tau_ob) / t1_ob)) * dx
-        y = [first_order(i) + min(data[process_variable]) if i >= tau_ob else 0 + min(data[process_variable]) for i in t]
+        with stage("model"):
+            arr = model_curve(len(data), freq, start, order, t_step, dx, pv_low, k_ob, tau_ob, t1_ob)
     elif order == "2nd Order T1 != T2":
-        dx_cur = (max(data[manipulated_variable]) - min(data[manipulated_variable])) * 1.0
-        dx = custom_slider('ΔMV', min(data[manipulated_variable]) - dx_cur, max(data[manipulated_variable]) + dx_cur,
-                       default=dx_cur)
-
-        k_ob_cur = (max(data[process_variable]) - min(data[process_variable])) * 1.0 / dx
-        k_ob = custom_slider('Kob', min(data[process_variable]) - k_ob_cur,
-                         max(data[process_variable]) + k_ob_cur,
-                         default=k_ob_cur)
-
-        mv_start = data[data[manipulated_variable].diff() >= 0.5 * dx].index[0]
-        pv_start = data[data[process_variable].diff() >= (max(data[process_variable]) - min(data[process_variable]))
-                        * 0.1].index[0]
-
-        tau_ob_cur = int((pv_start - mv_start).total_seconds())
+        tob_2_cur = tob_1_cur + 1
+        if auto_fit:
+            with stage("model"):
+                k_ob_cur, tau_ob_cur, tob_1_cur, tob_2_cur = fit_defaults(order, data[process_variable], freq, dx,
+                                                                          t_step, k_ob_cur, tau_ob_cur, tob_1_cur,
+                                                                          pv_low)
+
+        k_ob = custom_slider('Kob', pv_low - k_ob_cur,
+                             pv_high + k_ob_cur,
+                             default=k_ob_cur)
         tau_ob = custom_slider('τob', 0, tau_ob_cur * 3, default=tau_ob_cur, step=1)
-
-        tob_1_cur = int((data[data[process_variable] >= 0.632 *
-                              max(data[process_variable])].index[0] - pv_start).total_seconds())
-
         t1_ob = custom_slider('T1ob', 1, 3 * tob_1_cur, default=tob_1_cur, step=1)
         try:
-            t2_ob = custom_slider('T2ob', 1, 3 * tob_1_cur, default=tob_1_cur + 1, step=1)
+            t2_ob = custom_slider('T2ob', 1, 3 * tob_1_cur, default=tob_2_cur, step=1)
             if t2_ob == t1_ob:
                 raise ValueError
         except ValueError:
@@ -269,61 +441,39 @@ try:
 
         obj = PID_Object(order, round(k_ob, 4), tau_ob, t1_ob, t2_ob)
 
-        second_order = lambda i: k_ob * (1 - max(t1_ob, t2_ob) / (max(t1_ob, t2_ob) - min(t1_ob, t2_ob)) * \
-                                         np.exp(-(i - tau_ob) / max(t1_ob, t2_ob)) + min(t1_ob, t2_ob) /
-                                         (max(t1_ob, t2_ob) - min(t1_ob, t2_ob)) * np.exp
-                                         (-(i - tau_ob) / min(t1_ob, t2_ob))) * dx
-
-        y = [second_order(i) + min(data[process_variable]) if i >= tau_ob else 0 + min(data[process_variable]) for i in t]
+        with stage("model"):
+            arr = model_curve(len(data), freq, start, order, t_step, dx, pv_low, k_ob, tau_ob, t1_ob, t2_ob)
     elif order == "2nd Order T1 = T2":
-
-        dx_cur = (max(data[manipulated_variable]) - min(data[manipulated_variable])) * 1.0
-        dx = custom_slider('ΔMV', min(data[manipulated_variable]) - dx_cur, max(data[manipulated_variable]) + dx_cur,
-                       default=dx_cur)
-
-        k_ob_cur = (max(data[process_variable]) - min(data[process_variable])) * 1.0 / dx
-        k_ob = custom_slider('Kob', min(data[process_variable]) - k_ob_cur,
-                         max(data[process_variable]) + k_ob_cur,
-                         default=k_ob_cur)
-
-        mv_start = data[data[manipulated_variable].diff() >= 0.5 * dx].index[0]
-        pv_start = data[data[process_variable].diff() >= (max(data[process_variable]) - min(data[process_variable]))
-                        * 0.1].index[0]
-
-        tau_ob_cur = int((pv_start - mv_start).total_seconds())
+        if auto_fit:
+            with stage("model"):
+                k_ob_cur, tau_ob_cur, tob_1_cur, _ = fit_defaults(order, data[process_variable], freq, dx, t_step,
+                                                                  k_ob_cur, tau_ob_cur, tob_1_cur, pv_low)
+
+        k_ob = custom_slider('Kob', pv_low - k_ob_cur,
+                             pv_high + k_ob_cur,
+                             default=k_ob_cur)
         tau_ob = custom_slider('τob', 0, tau_ob_cur * 3, default=tau_ob_cur, step=1)
-
-        tob_1_cur = int((data[data[process_variable] >= 0.632 *
-                              max(data[process_variable])].index[0] - pv_start).total_seconds())
-
         t1_ob = custom_slider('Tob', 1, 3 * tob_1_cur, default=tob_1_cur, step=1)
         t2_ob = t1_ob
 
         obj = PID_Object(order, k_ob, tau_ob, t1_ob, t2_ob)
 
-        second_order_2 = lambda i: k_ob * (1 - np.exp(-(i - tau_ob) / t1_ob) * (1 + (i - tau_ob) / t1_ob)) * dx
-        y = [second_order_2(i) + min(data[process_variable]) if i >= tau_ob else 0 + min(data[process_variable]) for i in t]
+        with stage("model"):
+            arr = model_curve(len(data), freq, start, order, t_step, dx, pv_low, k_ob, tau_ob, t1_ob, t2_ob)
 
     if not order:
         st.stop()
-    else:
-        x = [dx if x >= 0 else 0 for x in t]
-        t = pd.to_timedelta(t, unit='s')
-        arr = pd.DataFrame({'ΔMV': x,
-                            'model': y},
-                           index=(t + start)
-                           )
-
-    data = pd.concat([arr, data], axis=1)
 
-    st.line_chart(data=data,
-                  x=None,
-                  y=[process_variable, manipulated_variable, 'model'],
-                  color=["#f00", "#00f", "#0f0"])
+    window = chart_window(data.index, "Chart window")
+    with stage("render"):
+        rows = chart_rows(data[[process_variable, manipulated_variable]], *window)
+        st.line_chart(data=pd.concat([arr.iloc[rows], data.iloc[rows]], axis=1),
+                      x=None,
+                      y=[process_variable, manipulated_variable, 'model'],
+                      color=["#f00", "#00f", "#0f0"])
 
     st.write("## Object Parameters")
     if order == "1st Order":
-        obj.t2_ob = None
         st.markdown(
             f"<h1 style='font-size: 24px;'>K = {round(obj.k_ob, 4)} <br> τ = {obj.tau_ob} <br> T = {obj.t1_ob}",
             unsafe_allow_html=True)
@@ -337,68 +487,48 @@ try:
 
     if st.selectbox("Choose PID type", ["PI", "PID"]) == "PI":
         obj.pid = 0
-        obj.d_pid = None
-        if obj.order == "1st Order":
-            obj.method = st.selectbox("Choose PID method", ["Optimal Modulus method",
-                                                            "Aperiodic Stability Method",
-                                                            "Coon Method",
-                                                            "Kopelovich Method",
-                                                            "Kopelovich-Sharkov Method",
-                                                            "Skogestads Method",
-                                                            "Lambda Method",
-                                                            "AMIGO Method",
-                                                            "Ziegler-Nichols Method",
-                                                            "Max Stability Method"])
-        elif obj.order == "2nd Order T1 != T2":
-            obj.method = st.selectbox("Choose PID method", ["Optimal Modulus method",
-                                                            "Huang Method"])
     else:
         obj.pid = 1
-        if obj.order == "1st Order":
-            obj.method = st.selectbox("Choose PID method", ["Optimal Modulus method",
-                                                            "Aperiodic Stability Method",
-                                                            "Coon Method",
-                                                            "Kopelovich Method",
-                                                            "Kopelovich-Sharkov Method",
-                                                            "Lambda Method",
-                                                            "AMIGO Method",
-                                                            "Ziegler-Nichols Method",
-                                                            "Max Stability Method"])
-        elif obj.order == "2nd Order T1 != T2":
-            obj.method = st.selectbox("Choose PID method", ["Optimal Modulus method",
-                                                            "Huang Method",
-                                                            "Skogestads Method"])
-    if obj.method == "Coon Method":
-        col1, col2 = st.columns(2)
-        with col1:
-            overshoot = st.selectbox("Choose process type", ["Aperiodic process",
-                                                             "20% overshoot process"])
-            if overshoot == "Aperiodic process":
-                obj.overshoot = 0
-            else:
-                obj.overshoot = 1
-        with col2:
-            disturbance = st.selectbox("Choose disturbance type", ["Setpoint disturbance",
-                                                                   "Load disturbance"])
-            if disturbance == "Setpoint disturbance":
-                obj.disturbance = 0
-            else:
-                obj.disturbance = 1
-    elif obj.method in ["Kopelovich Method", "Kopelovich-Sharkov Method"]:
-        overshoot = st.selectbox("Choose process type", ["Aperiodic process",
-                                                         "20% overshoot process",
-                                                         "Minimum I2 process"])
-        if overshoot == "Aperiodic process":
-            obj.overshoot = 0
-        elif overshoot == "20% overshoot process":
-            obj.overshoot = 1
-        else:
-            obj.overshoot = 2
-    elif obj.method == "Lambda Method":
+    best = []
+    if st.checkbox("Compare all methods"):
+        rank_by = st.selectbox("Rank methods by", list(INDICES))
+        with stage("tune"):
+            ranking = compare_all_methods(obj.order, obj.k_ob, obj.tau_ob, obj.t1_ob, obj.t2_ob, obj.pid, rank_by)
+        st.dataframe(ranking)
+        if len(ranking) and ranking["Stable"].iloc[0]:
+            best = [ranking["Method"].iloc[0]] + ranking["Variant"].iloc[0].split(", ")
+    if (obj.order, obj.pid) in METHODS:
+        methods = METHODS[(obj.order, obj.pid)]
+        obj.method = st.selectbox("Choose PID method", methods, index=preferred(methods, best))
+    tuning = TUNING_METHODS.get(obj.method)
+    if tuning is not None and tuning.options:
+        for column, (option, values) in zip(st.columns(len(tuning.options)), tuning.options.items()):
+            label, names = OPTION_MENUS[option]
+            names = [names[value] for value in values]
+            with column:
+                choice = st.selectbox(label, names, index=preferred(names, best))
+            setattr(obj, option, values[names.index(choice)])
+    if obj.method == "Lambda Method":
         # st.write(obj)
         obj.lamb = custom_slider('Lambda1', 1.0, 3.0, default=3.0, step=0.1)
-
-    obj.calculate_pid()
+    elif obj.method == "Optimized":
+        obj.criterion = st.selectbox("Minimize", list(CRITERIA))
+        st.caption(f"Settings minimize the {obj.criterion} of a setpoint step on the model with Ms ≤ {MS_LIMIT}, "
+                   "starting from the rule-based methods")
+
+    if tuning is not None and not tuning.is_valid(obj.k_ob, obj.tau_ob, obj.t1_ob, obj.t2_ob, obj.pid, obj.lamb):
+        st.warning(f"The model is outside the validity range of the {obj.method}: {tuning.validity}")
+
+    with stage("tune"):
+        if obj.method == "Optimized":
+            with st.spinner("Optimizing..."):
+                try:
+                    obj.calculate_pid()
+                except ArithmeticError as error:
+                    st.error(f"Optimization failed: {error}. Choose another method")
+                    st.stop()
+        else:
+            obj.calculate_pid()
 
     pid_form = st.selectbox(
         "Choose PID form", ["Standard form (Siemens, Honeywell, Emerson, ABB)",
@@ -442,6 +572,66 @@ try:
                 f"<h1 style='font-size: 24px;'>P = {round(100 / obj.p_pid, 4)} <br> I [s] = {round(obj.i_pid, 4)} <br> \
                 D [s] = {round(obj.d_pid, 4)}", unsafe_allow_html=True)
 
+    if obj.p_pid is not None and obj.i_pid is not None:
+        st.write("## Closed-loop Simulation")
+        with stage("tune"):
+            sim = closed_loop(obj.order, obj.k_ob, obj.tau_ob, obj.t1_ob, obj.t2_ob, obj.p_pid, obj.i_pid,
+                              obj.d_pid if obj.pid == 1 else None)
+        st.caption(f"Setpoint step of 1 at t = 0, load step of 1 at the process input at t = {round(sim.load_time)} s")
+        st.line_chart(pd.DataFrame({"PV": sim.y[0], "MV": sim.u[0]}, index=pd.Index(sim.t, name="t [s]")))
+        if sim.stable[0]:
+            st.table(pd.DataFrame({"IAE": sim.iae, "ISE": sim.ise, "Overshoot [%]": sim.overshoot,
+                                   "Settling time [s]": sim.settling_time, "Load IAE": sim.load_iae}))
+        else:
+            st.warning("Closed loop is unstable with these settings")
+
+        st.write("## Stability Margins")
+        with stage("tune"):
+            margins, response = open_loop_response(obj.order, obj.k_ob, obj.tau_ob, obj.t1_ob, obj.t2_ob, obj.p_pid,
+                                                   obj.i_pid, obj.d_pid if obj.pid == 1 else None)
+        col1, col2, col3, col4 = st.columns(4)
+        gain_margin_db = round(20 * np.log10(margins.gain_margin), 1)
+        col1.metric("Gain margin", f"{round(margins.gain_margin, 2)} ({gain_margin_db} dB)")
+        col2.metric("Phase margin", f"{round(margins.phase_margin, 1)}°")
+        col3.metric("Ms", round(margins.ms, 2))
+        col4.metric("Crossover [rad/s]", round(margins.gain_crossover, 4))
+        if margins.gain_margin < 1 or margins.phase_margin < 0:
+            st.warning("Negative stability margins: the loop is unstable with these settings")
+        frequency = alt.X("w:Q", title="ω [rad/s]", scale=alt.Scale(type="log"))
+        with stage("render"):
+            if st.checkbox("Show Nyquist plot"):
+                nyquist = response[np.hypot(response["re"], response["im"]) <= NYQUIST_RADIUS]
+                real, imaginary = alt.X("re:Q", title="Re L(jω)"), alt.Y("im:Q", title="Im L(jω)")
+                st.altair_chart(alt.Chart(nyquist).mark_line(color="#00f", order=False).encode(x=real, y=imaginary)
+                                + alt.Chart(pd.DataFrame({"re": [-1.0], "im": [0.0]})).mark_point(color="#f00")
+                                .encode(x=real, y=imaginary), use_container_width=True)
+            else:
+                magnitude = alt.Chart(response).mark_line(color="#00f").encode(
+                    x=frequency, y=alt.Y("magnitude:Q", title="Magnitude [dB]"))
+                phase = alt.Chart(response).mark_line(color="#f00").encode(
+                    x=frequency, y=alt.Y("phase:Q", title="Phase [deg]"))
+                st.altair_chart(alt.vconcat(magnitude, phase), use_container_width=True)
+
+        if st.checkbox("Robustness analysis (model uncertainty)"):
+            col1, col2 = st.columns(2)
+            with col1:
+                uncertainty = st.number_input("Model uncertainty (relative std of K, τ, T)", min_value=0.0,
+                                              max_value=1.0, value=0.2, step=0.05)
+            with col2:
+                samples = st.number_input("Perturbed models", min_value=100, max_value=100_000, value=10_000,
+                                          step=1_000)
+            with stage("tune"):
+                robust = robustness(obj.method, obj.order, obj.k_ob, obj.tau_ob, obj.t1_ob, obj.t2_ob, obj.pid,
+                                    obj.overshoot, obj.disturbance, obj.lamb, uncertainty, samples)
+            st.caption(f"Settings above stay stable with {round(100 * robust.stable.mean(), 1)}% of {samples} "
+                       f"perturbed models. P, I, D rows: what {obj.method} gives for the perturbed models.")
+            st.dataframe(summarize_robustness(robust))
+            index = st.selectbox("Distribution of", ["Overshoot [%]", "IAE", "Ms"])
+            values = {"Overshoot [%]": robust.overshoot, "IAE": robust.iae, "Ms": robust.ms}[index]
+            counts, edges = np.histogram(values[np.isfinite(values)], bins=50)
+            st.bar_chart(pd.DataFrame({"Models": counts}, index=pd.Index(np.round((edges[:-1] + edges[1:]) / 2, 3),
+                                                                         name=index)))
+
 except st.elements.lib.built_in_chart_utils.StreamlitColumnNotFoundError:
     st.error("Data doesn't have such a column")
 except ValueError:
@@ -451,6 +641,10 @@ except IndexError:
 except TypeError:
     st.error("Check separators")
 
+cache = tuning_cache.stats()
+st.caption("Stage timings: " + ", ".join(f"{name} {round(1000 * seconds, 1)} ms" for name, seconds in timings.items())
+           + f". Tuning cache: {cache['hits']} hits, {cache['misses']} misses")
+
 st.markdown("""
 # Disclaimer
 This software is provided "as is" for educational and informational purposes only.
@@ -13,6 +13,7 @@ st.markdown("""
 - [Data Loading](#Loading)
 - [Model Fitting](#Fitting)
 - [PID Tuning](#Tuning)
+- [Live Bump Test](#Live)
 - [References](#References)
 """, unsafe_allow_html=True)
 
@@ -215,6 +216,7 @@ controllers. Some of them are listed below:
 9. AMIGO method [8]
 10. Lambda Tuning [8]
 11. Skogestad's method [9]
+12. Optimized: settings minimizing IAE or ITAE on the identified model with maximum sensitivity Ms ≤ 1.4
 
 ---
 """)
@@ -231,7 +233,9 @@ st.image("pics/data_loading.png", caption="Data Loading")
 
 st.markdown("""
 If your file is larger than 200 MB you can select the corresponding checkbox.
-This action will scan the application's root directory and display a dropdown list of available .csv files.
+This action will scan the application's root directory and display a dropdown list of available .csv files.  
+Large files are read in chunks: only the chosen MV and PV columns are loaded, either around the MV step 
+(set the time to keep before and after it) or within a time range you enter.
 """)
 
 st.image("pics/data_loading_2.png", caption="Data Loading 2")
@@ -274,7 +278,8 @@ First, you need to choose the Manipulated Variable (MV) and Process Variable (PV
 - **Manipulated variable** is valve position percentage % - variable you change to get response (process input).
 - **Process variable** is the current measured process value - response from the input change (process output).
 
-Tick "Show linechart" to check your data.
+Tick "Show linechart" to check your data. Long records are drawn with about 2000 points that keep every peak; use 
+the window slider above a chart to zoom into a time range at full detail.
 
 Then you can select the model order using dropdown list.
 """)
@@ -283,7 +288,19 @@ st.image("pics/MV_PV_order.png", caption="Model Fitting")
 
 st.markdown("""
 The program will automatically calculate all coefficients. You can then manually adjust them using sliders or 
-by entering the required values.
+by entering the required values.  
+Tick "Preprocess data" to clean raw historian data before fitting: resample MV and PV to a uniform interval 
+(PV is interpolated, MV holds its value so steps stay sharp; 0 keeps the original samples), clip outliers further 
+than the given number of robust deviations from the local median, and smooth PV with a median, Savitzky-Golay or 
+zero-phase low-pass filter over the chosen window. The result is cached, so changing other settings does not 
+filter the record again.  
+The dead time is also estimated from the cross-correlation of MV and PV changes over all delays at once; the 
+estimate and its confidence are shown above the sliders, and a confident estimate (0.7 or more) becomes the τob 
+default. Noisy records with a single small step give low confidence and keep the heuristic value.  
+Tick "Fit model automatically (least squares)" to start the sliders from the model that best matches the measured PV; 
+the fit quality (R², RMSE) is shown above the sliders.
+Tick "Identify every MV step in the record" to fit the model around each bump test in the file and see the per-step 
+parameters with their spread.
 
 ΔMV is a step input in your data. Kob, τob, Tob are object [model](#Object) coefficients.
 """)
@@ -307,13 +324,75 @@ st.markdown("""
 
 First, you need to choose PID type (PI/PID).  
 Then choose one of the available methods from the dropdown list. The available methods depend on the selected model 
-order and PID type.  
+order and PID type. Methods with a limited validity range (e.g. Ziegler-Nichols PI needs τ/T ≥ 1) show a 
+warning when the model is outside it.  
 Finally, select the PID form you need. The corresponding equation will appear below to help ensure correct selection.  
 PID parameters will appear below.  
 """)
 
 st.image("pics/pid_tuning.png", caption="PID Tuning")
 
+st.markdown("""
+"Optimized" searches for the P, I (and D) that give the smallest IAE or ITAE of a setpoint step on the fitted 
+model while keeping Ms (maximum sensitivity) at or below 1.4. It starts from the rule-based settings, so it is 
+never worse than the best of them that meets the Ms limit. The search takes a second or two; results are 
+remembered, so the same model is not optimized twice.
+
+Tick "Compare all methods" to tune the model with every method available for the chosen PID type (and every process 
+type/disturbance variant), simulate each of them in closed loop and see one table ranked by the chosen index. Unstable 
+settings go last. The method dropdowns then start at the best-ranked rule.
+""")
+
+st.markdown("""
+The "Closed-loop Simulation" chart shows how the loop would behave with these settings on the fitted model: a 
+setpoint step of 1 at t = 0 and a load step of 1 at the process input halfway through. The table below it lists IAE, 
+ISE, overshoot, settling time (2% band) and the IAE after the load step.
+""")
+
+st.markdown("""
+"Stability Margins" evaluates the open loop (controller times model, with the exact dead time) over frequency: 
+gain margin (how many times the loop gain may grow before instability; 2 or more is usual), phase margin (30-60° is 
+usual), Ms (maximum sensitivity) and the crossover frequency. The Bode plot shows magnitude and phase of the open 
+loop; tick "Show Nyquist plot" to see its curve around the critical point -1 instead.
+""")
+
+st.markdown("""
+Tick "Robustness analysis" to check how much the settings rely on the exact model. Thousands of models are drawn 
+around the fitted one (K, τ and T vary by the given relative spread), the same settings are simulated with each of 
+them, and the table shows the 5%, 50% and 95% quantiles of overshoot, IAE and Ms (maximum sensitivity; below 1.4 
+is robust, above 2 is aggressive). The P, I and D rows show how much the chosen rule itself would move the settings 
+for those models. The chart shows the distribution of the chosen index.
+""")
+
+st.markdown("""
+The "Stage timings" line at the bottom of the page shows where the last rerun spent its time (load, detect, model, 
+tune, render). Every stage is cached on its own inputs: moving a model slider recomputes only the model curve, the PID 
+settings and the simulation, never the data loading or the step detection. PID settings are also kept in a tuning 
+cache shared by all sessions and batch runs; its hits and misses are shown on the same line.
+""")
+
+st.markdown("""
+---
+""")
+st.markdown('<a name="Live"></a>', unsafe_allow_html=True)
+st.markdown("""
+## Live Bump Test
+### Live Bump Test page runs a bump test on streaming data
+
+Choose "Simulated plant" to test offline: set the plant model (K, τ, T1, T2), measurement noise and simulation speed, 
+press "Start plant", then change MV and press "Apply MV" to make a step. Choose "Replay .csv file" to play a historian 
+file from the root directory back as a live stream.  
+New samples are read every second into a buffer of the latest 20000 samples. After every MV step the model is refitted 
+on the response collected so far, starting from the previous fit, and the PID settings of the chosen method are 
+updated with it.  
+Connections to a real PLC (OPC UA, Modbus) plug in as data sources with the same `read()` interface as 
+`SimulatedPlant` and `CsvReplay` in `utils/Data_Source.py`.
+
+Choose "Recursive, follows drift" to estimate a 1st order model with recursive least squares instead. It has a 
+forgetting factor, so the model and the PID settings follow a process that drifts with load or fouling. A bank of 
+estimators covers every dead time from 0 to 60 samples, and the best-fitting one is shown.
+""")
+
 st.markdown("""
 ---
 """)
@@ -0,0 +1,144 @@
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils import (METHODS, OPTION_MENUS, TUNING_METHODS, CsvReplay, LiveIdentification, PID_Object, RecursiveEstimator,
+                   SimulatedPlant, chart_positions)
+
+REFRESH = 1.0  # [s] between reads of new samples
+
+
+def start(source, order):
+    if "live_source" in st.session_state:
+        st.session_state["live_source"].close()
+    st.session_state["live_source"] = source
+    st.session_state["live_model"] = LiveIdentification(order)
+    st.session_state["live_estimator"] = RecursiveEstimator(source.dt)
+
+
+st.set_page_config(
+    page_title="Live Bump Test",
+)
+
+st.write("# Live Bump Test")
+st.write("Run a bump test on live data and watch the model fit update as samples arrive.")
+
+order = st.selectbox("Choose model", ["1st Order", "2nd Order T1 != T2"])
+kind = st.radio("Data source", ["Simulated plant", "Replay .csv file"], horizontal=True)
+if kind == "Simulated plant":
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        k_ob = st.number_input("K", value=2.0)
+        noise = st.number_input("PV noise", min_value=0.0, value=0.02)
+    with col2:
+        tau_ob = st.number_input("τ [s]", min_value=0.0, value=10.0)
+        speed = st.number_input("Speed (x real time)", min_value=1.0, value=10.0)
+    with col3:
+        t1_ob = st.number_input("T1 [s]", min_value=0.1, value=30.0)
+    with col4:
+        t2_ob = st.number_input("T2 [s]", min_value=0.1, value=10.0) if order != "1st Order" else None
+    if st.button("Start plant"):
+        start(SimulatedPlant(order, k_ob, tau_ob, t1_ob, t2_ob, noise=noise, speed=speed), order)
+else:
+    st.write("Put your file in root directory")
+    file_name = st.selectbox("Choose data file", [f for f in os.listdir('.') if f.endswith('.csv')], index=None)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        separator = st.radio("Column separator", [";", ",", ".", "  "])
+        mv = st.text_input("MV column")
+    with col2:
+        decimal_sep = st.radio("Decimal separator", [",", "."])
+        pv = st.text_input("PV column")
+    with col3:
+        header_row = st.number_input("Header is in row", min_value=0, step=1)
+        skip_rows = st.number_input("Rows to skip", min_value=0, step=1)
+        speed = st.number_input("Speed (x real time)", min_value=1.0, value=10.0)
+    date_format = st.selectbox("Datetime format:", ["%d.%m.%Y %H:%M:%S", "%m.%d.%Y %H:%M:%S"])
+    if st.button("Start replay") and file_name and mv and pv:
+        start(CsvReplay(file_name, separator, decimal_sep, header_row, skip_rows, 0, date_format, mv, pv,
+                        speed=speed), order)
+
+if "live_source" not in st.session_state:
+    st.stop()
+
+source = st.session_state["live_source"]
+if isinstance(source, SimulatedPlant):
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        new_mv = st.number_input("MV", value=source.mv)
+    with col2:
+        st.write("")
+        if st.button("Apply MV"):
+            source.set_mv(new_mv)
+
+estimation = st.radio("Estimation", ["Refit latest MV step (least squares)",
+                                      "Recursive, follows drift (RLS, 1st order)"], horizontal=True)
+recursive = estimation.startswith("Recursive")
+pid = st.selectbox("Choose PID type", ["PI", "PID"]) == "PID"
+# Optimized runs a closed loop search (seconds), too slow to repeat on every refresh
+methods = [name for name in METHODS[("1st Order" if recursive else order, int(pid))] if name != "Optimized"]
+method = st.selectbox("Choose PID method", methods)
+options = {}
+tuning = TUNING_METHODS[method]
+if tuning.options:
+    for column, (option, values) in zip(st.columns(len(tuning.options)), tuning.options.items()):
+        label, names = OPTION_MENUS[option]
+        names = [names[value] for value in values]
+        with column:
+            choice = st.selectbox(label, names)
+        options[option] = values[names.index(choice)]
+
+
+@st.fragment(run_every=REFRESH)
+def live_view():
+    model = st.session_state["live_model"]
+    estimator = st.session_state["live_estimator"]
+    try:
+        t, mv, pv = source.read()
+        fit = model.update(t, mv, pv)
+        estimator.update_many(mv, pv)
+    except (KeyError, ValueError):
+        st.error("Check MV/PV columns and separators")
+        return
+    samples = model.buffer.view()
+    if not len(samples):
+        st.write("Waiting for samples...")
+        return
+    rows = chart_positions(samples[:, 1:])
+    st.line_chart(pd.DataFrame({"MV": samples[rows, 1], "PV": samples[rows, 2]},
+                               index=pd.Index(samples[rows, 0], name="t [s]")), color=["#00f", "#f00"])
+    if recursive:
+        obj = estimator.pid_object(method, int(pid), **options)
+        if not np.isfinite(obj.k_ob):
+            st.write("Waiting for excitation...")
+            return
+        st.caption(f"Recursive estimate after {estimator.count} samples")
+    else:
+        if fit is None:
+            st.write("Waiting for an MV step..." if model.step is None else "Collecting the response...")
+            return
+        st.caption(f"Fit on {model.buffer.count - model.step} samples since the MV step: R² = {round(fit.r2, 4)}, "
+                   f"RMSE = {round(fit.rmse, 4)}")
+        obj = PID_Object(order, fit.k_ob, fit.tau_ob, fit.t1_ob, fit.t2_ob)
+        obj.pid = int(pid)
+        obj.method = method
+        for option, value in options.items():
+            setattr(obj, option, value)
+        try:
+            obj.calculate_pid()
+        except ArithmeticError:
+            pass
+    st.markdown(f"<h1 style='font-size: 24px;'>K = {round(obj.k_ob, 4)} <br> τ = {round(obj.tau_ob, 2)} <br> "
+                f"T<sub>1</sub> = {round(obj.t1_ob, 2)}"
+                + (f"<br>T<sub>2</sub> = {round(obj.t2_ob, 2)}" if obj.t2_ob is not None else "") + "</h1>",
+                unsafe_allow_html=True)
+
+    if obj.p_pid is not None and np.isfinite(obj.p_pid):
+        d_text = f" <br> D [s] = {round(obj.d_pid, 4)}" if pid else ""
+        st.markdown(f"<h1 style='font-size: 24px;'>P = {round(obj.p_pid, 4)} <br> I [s] = {round(obj.i_pid, 4)}"
+                    f"{d_text}", unsafe_allow_html=True)
+
+
+live_view()
@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+import time
+
+from utils.Bulk_Tuning import DEFAULT_OPTIONS, directory_jobs, read_manifest, tune_files
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Identify process models and calculate PID settings for many .csv files without the web app.")
+    parser.add_argument("source", help="folder with .csv files or manifest .csv (columns: file, mv, pv, "
+                                       "optionally order, separator, decimal_sep, header_row, skip_rows, "
+                                       "skip_columns, date_format)")
+    parser.add_argument("--mv", help="manipulated variable column (folder mode)")
+    parser.add_argument("--pv", help="process variable column (folder mode)")
+    parser.add_argument("--order", default=DEFAULT_OPTIONS["order"], choices=["1st Order", "2nd Order T1 != T2"])
+    parser.add_argument("--separator", default=DEFAULT_OPTIONS["separator"])
+    parser.add_argument("--decimal-sep", default=DEFAULT_OPTIONS["decimal_sep"])
+    parser.add_argument("--header-row", type=int, default=DEFAULT_OPTIONS["header_row"])
+    parser.add_argument("--skip-rows", type=int, default=DEFAULT_OPTIONS["skip_rows"])
+    parser.add_argument("--skip-columns", type=int, default=DEFAULT_OPTIONS["skip_columns"])
+    parser.add_argument("--date-format", default=DEFAULT_OPTIONS["date_format"])
+    parser.add_argument("-o", "--output", default="pid_results.csv", help="results table (.csv)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if os.path.isdir(args.source):
+        if not (args.mv and args.pv):
+            sys.exit("--mv and --pv are required when source is a folder")
+        jobs = directory_jobs(args.source, args.mv, args.pv,
+                              order=args.order,
+                              separator=args.separator,
+                              decimal_sep=args.decimal_sep,
+                              header_row=args.header_row,
+                              skip_rows=args.skip_rows,
+                              skip_columns=args.skip_columns,
+                              date_format=args.date_format)
+    else:
+        jobs = read_manifest(args.source)
+    if not jobs:
+        sys.exit("No .csv files to process")
+
+    def progress(job, error, seconds, done, total):
+        status = f"FAILED {error}" if error else "ok"
+        print(f"[{done}/{total}] {job['file']} {seconds:.2f} s {status}", flush=True)
+
+    begin = time.perf_counter()
+    results, report = tune_files(jobs, workers=args.workers, progress=progress)
+    results.to_csv(args.output, index=False)
+    failed = report["error"].notna().sum()
+    print(f"{len(jobs) - failed} of {len(jobs)} files tuned in {time.perf_counter() - begin:.2f} s, "
+          f"results saved to {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
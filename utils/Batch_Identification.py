@@ -0,0 +1,99 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .Identification import fit_model
+
+STEP_THRESHOLD = 0.25  # fraction of the largest single-sample MV change a step must exceed
+MIN_GAP = 10  # samples; closer changes are merged into one step event
+PARAMETERS = ["k_ob", "tau_ob", "t1_ob", "t2_ob"]
+
+
+def find_steps(mv, threshold, min_gap=MIN_GAP):
+    """
+    Positions of every MV step event, found in one vectorized pass over |ΔMV|.
+    Changes closer than `min_gap` samples (ramped or multi-sample steps) count as one event.
+    """
+    mv = np.asarray(mv, dtype=float)
+    hits = np.flatnonzero(np.abs(np.diff(mv)) >= threshold) + 1
+    if not len(hits):
+        return hits
+    return hits[np.concatenate(([True], np.diff(hits) >= min_gap))]
+
+
+def segment_steps(steps, length):
+    """
+    (begin, step, end) sample ranges for every step: from a quarter of the way back to the previous step
+    (steady state before the step) up to the next step.
+    """
+    bounds = np.concatenate((steps, [length]))
+    previous = np.concatenate(([0], steps[:-1]))
+    begins = steps - np.maximum((steps - previous) // 4, 1)
+    return list(zip(np.maximum(begins, 0), steps, bounds[1:]))
+
+
+def _initial_guess(t, pv, t_step, y0):
+    """
+    Dead time and time constant guesses from 10% and 63.2% crossings of the PV change.
+    """
+    change = pv - y0
+    final = np.median(change[-max(1, len(change) // 10):])
+    if final == 0:
+        return 0.0, max(t[-1] - t_step, 1.0) / 5
+    reached = change / final
+    after = t >= t_step
+    start = np.flatnonzero(after & (reached >= 0.1))
+    crossing = np.flatnonzero(after & (reached >= 0.632))
+    tau = t[start[0]] - t_step if len(start) else 0.0
+    t1 = t[crossing[0]] - t_step - tau if len(crossing) else (t[-1] - t_step) / 5
+    return max(tau, 0.0), max(t1, t[1] - t[0])
+
+
+def _fit_segment(args):
+    t, mv, pv, order, step = args
+    y0 = float(np.median(pv[:step]))
+    dx = float(np.median(mv[step:]) - np.median(mv[:step]))
+    if dx == 0 or len(t) - step < 3:
+        return None
+    tau, t1 = _initial_guess(t, pv, t[step], y0)
+    fit = fit_model(t, pv, order, dx, tau, t1, t0=t[step], y0=y0)
+    return {"step_time": t[step], "dx": dx, "k_ob": fit.k_ob, "tau_ob": fit.tau_ob, "t1_ob": fit.t1_ob,
+            "t2_ob": fit.t2_ob, "r2": fit.r2, "rmse": fit.rmse}
+
+
+def identify_steps(t, mv, pv, order, threshold=None, min_gap=MIN_GAP, workers=None):
+    """
+    Find every MV step in the record, fit `order` model around each of them and return one row per step
+    (step_time [s], dx, k_ob, tau_ob, t1_ob, t2_ob, r2, rmse).
+    Segments are fitted in parallel on `workers` processes (all cores by default, 1 runs in-process).
+    """
+    t = np.asarray(t, dtype=float)
+    mv = np.asarray(mv, dtype=float)
+    pv = np.asarray(pv, dtype=float)
+    if threshold is None:
+        threshold = STEP_THRESHOLD * np.nanmax(np.abs(np.diff(mv)))
+    steps = find_steps(mv, threshold, min_gap)
+    tasks = [(t[begin:end], mv[begin:end], pv[begin:end], order, step - begin)
+             for begin, step, end in segment_steps(steps, len(t))]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) < 2:
+        rows = list(map(_fit_segment, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            rows = list(executor.map(_fit_segment, tasks))
+    return pd.DataFrame([row for row in rows if row is not None],
+                        columns=["step_time", "dx"] + PARAMETERS + ["r2", "rmse"])
+
+
+def summarize_steps(steps, min_r2=0.0):
+    """
+    Spread of the per-step model parameters (mean, median, std, min, max) over steps fitted with R² >= `min_r2`.
+    Parameters without any value (t2_ob of 1st order fits) are left out.
+    """
+    values = steps.loc[steps["r2"] >= min_r2, PARAMETERS].astype(float)
+    if len(values):
+        values = values.dropna(axis=1, how="all")
+    return values.agg(["mean", "median", "std", "min", "max"])
@@ -0,0 +1,177 @@
+import numpy as np
+
+COON = {
+    (0, 0, 0): (0.35, 1.2, 0, None),
+    (0, 0, 1): (0.6, 4, 0, None),
+    (0, 1, 0): (0.6, 1, 0, None),
+    (0, 1, 1): (0.7, 2.3, 0, None),
+    (1, 0, 0): (0.6, 1, 0, 0.5),
+    (1, 0, 1): (0.95, 2.4, 0, 0.42),
+    (1, 1, 0): (0.95, 1.35, 0, 0.47),
+    (1, 1, 1): (1.2, 2, 0, 0.42),
+}  # (pid, overshoot, disturbance): P * tau / T, I = a * tau + b * T, D / tau
+
+KOPELOVICH = {
+    (0, 0): (0.6, 0, 0.6, None),
+    (0, 1): (0.7, 0, 0.7, None),
+    (0, 2): (1.0, 0, 1.0, None),
+    (1, 0): (0.95, 2.4, 0, 0.4),
+    (1, 1): (1.2, 2.0, 0, 0.4),
+    (1, 2): (1.4, 1.3, 0, 0.5),
+}  # (pid, overshoot): P * K * tau / T, I = a * tau + b * T, D / tau
+
+KOPELOVICH_SHARKOV = {
+    **KOPELOVICH,
+    (0, 0): (0.6, 0.8, 0.5, None),
+    (0, 1): (0.7, 1, 0.3, None),
+    (0, 2): (1.0, 1, 0.35, None),
+}
+
+
+def table_formula(table, settings, per_gain):
+    """
+    Vectorized formula of a coefficient table {(pid, *settings): (P * tau / T, a, b, D / tau)} with I = a tau + b T;
+    P is also divided by K when `per_gain`. The settings (e.g. overshoot) may be arrays, one variant per model;
+    combinations missing from the table give NaN.
+    """
+    size = np.max(list(table), axis=0) + 1
+    coefficients = np.full((*size, 4), np.nan)
+    for key, row in table.items():
+        coefficients[key] = [np.nan if value is None else value for value in row]
+
+    def method(order, k, tau, t1, t2, pid, **options):
+        index = [np.asarray(pid)] + [np.asarray(options.get(name, 0)) for name in settings]
+        known = True
+        for value, bound in zip(index, size):
+            known = known & (value >= 0) & (value < bound)
+        row = coefficients[tuple(np.clip(value, 0, bound - 1) for value, bound in zip(index, size))]
+        row = np.where(np.asarray(known)[..., None], row, np.nan)
+        p = row[..., 0] * t1 / (k * tau) if per_gain else row[..., 0] * t1 / tau
+        return p, row[..., 1] * tau + row[..., 2] * t1, row[..., 3] * tau
+    return method
+
+
+def _optimal_modulus(order, k, tau, t1, t2, pid, **_):
+    if t2 is None:
+        t = t1 / tau
+        if pid == 0:
+            kr = (6 * t ** 3 + 6 * t ** 2 + 3 * t + 1) / (4 * (3 * t ** 2 + 3 * t + 1))
+            i = (6 * t ** 3 + 6 * t ** 2 + 3 * t + 1) / (6 * t ** 2 + 6 * t + 3)
+            return kr, i * tau, None
+        i = (180 * t ** 4 + 240 * t ** 3 + 135 * t ** 2 + 42 * t + 7) / (15 * (2 * t + 1) * (6 * t ** 2 + 3 * t + 1))
+        d = (60 * t ** 4 + 60 * t ** 3 + 27 * t ** 2 + 7 * t + 1) / (180 * t ** 4 + 240 * t ** 3 + 135 * t ** 2 + 42 * t
+                                                                    + 7)
+        kr = 1 / (2 / i * (t + 1) - 2)
+        return kr, i * tau, d * tau
+
+    t1, t2 = t1 / tau, t2 / tau
+    if pid == 0:
+        kr = (3 * (2 * (t2 ** 3 + t2 ** 2 * t1 + t1 ** 3) + 2 * (t2 ** 2 + t2 * t1 + t1 ** 2) + t2 + t1) + 1) / (
+                12 * (t1 + t2) * (t1 * t2 + t1 + t2 + 1) + 4)
+        i = (2 * kr * (t1 + t2 + 1)) / (2 * kr + 1)
+        return kr, i * tau, None
+    kr = (360 * t1 ** 2 * t2 ** 2 * (t2 ** 3 + 3 * t1 * t2 ** 2 + 3 * t2 * t1 ** 2 + t1 ** 3) +
+          360 * t1 * t2 * (t2 ** 4 + 5 * t1 * t2 ** 3 + 8 * t1 ** 2 * t2 ** 2 + 5 * t1 ** 3 * t2 + t1 ** 4)
+          + 180 * (t2 ** 5 + 7 * t1 * t2 ** 4 + 16 * t1 ** 2 * t2 ** 3 + 16 * t1 ** 3 * t2 ** 2 + 7 * t1 **
+          4 * t2 + t1 ** 5) + 60 * (7 * t2 ** 4 + 25 * t1 * t2 ** 3 + 36 * t1 ** 2 * t2 ** 2 + 25 * t1 ** 3
+          * t2 + 7 * t1 ** 4) + 5 * (75 * t2 ** 3 + 177 * t1 * t2 ** 2 + 177 * t1 ** 2 * t2 + 75 * t1 ** 3)
+          + 3 * (59 * t2 ** 2 + 98 * t1 * t2 + 59 * t1 ** 2) + 49 * (t1 + t2) + 7) / (720 * (t1 + t2) ** 2
+          * t1 ** 2 * t2 ** 2 + 720 * (t1 + t2) * t1 * t2 * (t2 ** 2 + 3 * t1 * t2 + t1 ** 2) + 240 *
+          (t1 + t2) ** 2 * (t2 ** 2 + 6 * t1 * t2 + t1 ** 2) + 240 * (t1 + t2) * (2 * t2 ** 2 + 5 * t1 * t2
+          + 2 * t1 ** 2) + 336 * (t1 + t2) ** 2 + 112 * (t1 + t2) + 16)
+    i = (2 * kr * (t1 + t2 + 1)) / (2 * kr + 1)
+    d = (4 * kr * (3 * (t1 + t2) * (2 * t2 + t1 + 1) + 1) - 3 * (t1 + t2) * (2 * (t2 ** 2 + t1 ** 2) + 3) -
+         6 * (t2 ** 2 + t2 * t1 + t1 ** 2) - 1) / (12 * kr * ((t1 + t2) * (t1 + t2 + 2) + 1))
+    return kr, i * tau, d * tau
+
+
+def _aperiodic_stability(order, k, tau, t1, t2, pid, **_):
+    t = t1 / tau
+    tt = 1 / (2 * t)
+    if pid == 0:
+        rk = np.sqrt(2 + tt ** 2) - (2 + tt)
+        i = (1 + tt ** 2) / ((3 + tt + 4 * tt ** 2 + tt ** 3) - (2 + tt ** 2) * np.sqrt(2 + tt ** 2))
+        kr = 2 * t * (np.sqrt(2 + tt ** 2) - 1) * np.exp(rk)
+        return kr, i * tau, None
+    root = np.sqrt(3 + tt ** 2)
+    rk = root - (3 + tt)
+    i = ((6 + tt) * root - (9 + tt + tt ** 2)) / ((21 + 6 * tt + tt ** 2) * root - (36 + 9 * tt + 6 * tt ** 2 + tt ** 3))
+    d = (root - 1) / (2 * ((6 + tt) * root - (9 + tt + tt ** 2)))
+    kr = 2 * t * ((6 + tt) * root - (9 + tt + tt ** 2)) * np.exp(rk)
+    return kr, i * tau, d * tau
+
+
+def _huang(order, k, tau, t1, t2, pid, **_):
+    t1, t2 = np.maximum(t1, t2), np.minimum(t1, t2)
+    if pid == 0:
+        p = (1 / k) * ((-13.054 - 9.0916 * tau / t1 + 2.6647 * t2 / t1 + 9.162 * tau * t2 / t1 ** 2) +
+                       (0.3053 * (tau / t1) ** (-1.0169) + 1.1075 * (tau / t1) ** 3.5959 - 2.2927 * (tau / t1)
+                        ** 3.6843) + (-31.0306 * (t2 / t1) ** 0.8476 - 13.0155 * (t2 / t1) ** 2.6083 + 9.6899 *
+                                      (t2 / t1) ** 2.9049) +
+                       (-0.6418 * (t2 / tau) + 18.9643 * (t2 / t1) * (tau / t1) ** (-0.2016) - 39.7340 * (t2 / t1) *
+                        (tau / t1) ** 1.3293) +
+                       (28.155 * (tau / t1) * (t2 / t1) ** 0.801 - 2.0067 * (tau / t1) * (t2 / t1) ** 3.956) +
+                       (4.825 * np.exp(tau / t1) + 2.1137 * np.exp(t2 / t1) + 8.4511 * np.exp(tau * t2 / t1 ** 2)))
+        i = t1 * (0.9771 - 0.2492 * tau / t1 + 0.8753 * t2 / t1 + 3.4651 * (tau / t1) ** 2 - 3.8516 * tau * t2 / t1 ** 2)
+        return p, i, None
+    lead = 0.0052 * t2 ** 2 / tau + 0.898 * t2 + 0.4877 * tau
+    p = 0.589 / (k * tau) * (tau / t2) ** 0.003 * (lead + t1)
+    i = lead + t1
+    d = t1 * lead / (lead + t1)
+    return p, i, d
+
+
+def _skogestads(order, k, tau, t1, t2, pid, **_):
+    minimum = np.minimum(t1, 4 * tau)
+    if pid == 0 and order == "1st Order":
+        p, i, d = t1 / (2 * k * tau), minimum, None
+    elif pid == 1 and order == "2nd Order T1 != T2":
+        p = t1 * (1 + t2 / minimum) / (2 * k * tau)
+        i = minimum * (1 + t2 / minimum)
+        d = t2 / (1 + t2 / minimum)
+    else:
+        nan = np.full(np.shape(t1 / tau), np.nan)
+        return nan, nan, None if pid == 0 else nan
+    return p, i, d
+
+
+def _lambda(order, k, tau, t1, t2, pid, lamb=3.0, **_):
+    tcl = lamb * t1
+    if pid == 0:
+        p, i, d = t1 / (k * (tau + tcl)), t1 + 0 * tau, None
+    else:
+        p = (tau / 2 + t1) / (k * (tau / 2 + tcl))
+        i = t1 + tau / 2
+        d = t1 * tau / (2 * t1 + tau)
+    return p, i, d
+
+
+def _amigo(order, k, tau, t1, t2, pid, **_):
+    if pid == 0:
+        p = 0.15 / k + (0.35 - tau * t1 / (tau + t1) ** 2) * t1 / (tau * k)
+        i = 0.35 * tau + (13 * tau * t1 ** 2) / (t1 ** 2 + 12 * tau * t1 + 7 * tau ** 2)
+        return p, i, None
+    p = (0.2 + 0.45 * t1 / tau) / k
+    i = tau * (0.4 * tau + 0.8 * t1) / (tau + 0.1 * t1)
+    d = 0.5 * tau * t1 / (0.3 * tau + t1)
+    return p, i, d
+
+
+def _ziegler_nichols(order, k, tau, t1, t2, pid, **_):
+    if pid == 0:
+        return 0.9 * t1 / (k * tau), 3.33 * tau + 0 * t1, None
+    return 1.6 * t1 / (k * tau), 2 * tau + 0 * t1, 0.5 * tau + 0 * t1
+
+
+def _max_stability(order, k, tau, t1, t2, pid, **_):
+    if pid == 0:
+        j = 2 / tau + 1 / (2 * t1) - np.sqrt((2 / tau ** 2) + (1 / (4 * t1 ** 2)))
+        p = 1 / k * ((tau + 2 * t1) * j - tau * t1 * j ** 2 - 1) * np.exp(-tau * j)
+        ki = 1 / k * ((tau + t1) - tau * t1 * j) * j ** 2 * np.exp(-tau * j)
+        return p, p / ki, None
+    j = 3 / tau + 1 / (2 * t1) - np.sqrt((3 / tau ** 2) + (1 / (4 * t1 ** 2)))
+    p = 1 / k * (-tau ** 2 * t1 * j ** 3 + (tau ** 2 + 3 * tau * t1) * j ** 2 - tau * j - 1) * np.exp(-tau * j)
+    ki = 1 / (2 * k) * (-tau ** 2 * t1 * j ** 4 + (tau ** 2 + 2 * tau * t1) * j ** 3 + 4 * t1 * j ** 2
+                        - 4 * j) * np.exp(-tau * j)
+    kd = 1 / (2 * k) * (tau ** 2 * (j - t1 * j ** 2) - 2 * tau * (1 - 2 * t1 * j) - 2 * t1) * np.exp(-tau * j)
+    return p, p / ki, kd / p
@@ -0,0 +1,125 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from .Data_Loader import frame_stats, get_data
+from .Identification import fit_model, guess_model
+from .Methods import METHOD_VARIANTS, METHODS
+from .PID_Classes import PID_Object
+
+DEFAULT_OPTIONS = {"order": "1st Order",
+                   "separator": ";",
+                   "decimal_sep": ",",
+                   "header_row": 0,
+                   "skip_rows": 0,
+                   "skip_columns": 0,
+                   "date_format": "%d.%m.%Y %H:%M:%S"}
+
+
+def tune_model(order, k_ob, tau_ob, t1_ob, t2_ob=None, lamb=3.0, pids=(0, 1)):
+    """
+    P/I/D of every method applicable to the model, for each PID type in `pids` (0 - PI, 1 - PID)
+    and every method variant. Returns a list of rows (pid, method, overshoot, disturbance, p_pid, i_pid, d_pid);
+    gains are None where the method's formula is undefined for the model (e.g. zero dead time).
+    """
+    rows = []
+    for pid, pid_name in ((0, "PI"), (1, "PID")):
+        if pid not in pids:
+            continue
+        for method in METHODS.get((order, pid), []):
+            for variant in METHOD_VARIANTS.get(method, [{}]):
+                obj = PID_Object(order, k_ob, tau_ob, t1_ob, t2_ob)
+                obj.pid = pid
+                obj.method = method
+                obj.lamb = lamb
+                obj.overshoot = variant.get("overshoot")
+                obj.disturbance = variant.get("disturbance")
+                try:
+                    obj.calculate_pid()
+                except ArithmeticError:
+                    obj.p_pid = obj.i_pid = obj.d_pid = None
+                rows.append({"pid": pid_name,
+                             "method": method,
+                             "overshoot": obj.overshoot,
+                             "disturbance": obj.disturbance,
+                             "p_pid": obj.p_pid,
+                             "i_pid": obj.i_pid,
+                             "d_pid": obj.d_pid if pid == 1 else None})
+    return rows
+
+
+def tune_file(file, mv, pv, order=DEFAULT_OPTIONS["order"], separator=DEFAULT_OPTIONS["separator"],
+              decimal_sep=DEFAULT_OPTIONS["decimal_sep"], header_row=DEFAULT_OPTIONS["header_row"],
+              skip_rows=DEFAULT_OPTIONS["skip_rows"], skip_columns=DEFAULT_OPTIONS["skip_columns"],
+              date_format=DEFAULT_OPTIONS["date_format"]):
+    """
+    Load one .csv, identify the model around its MV step and tune it with every applicable method.
+    Returns a DataFrame with one row per (PI/PID, method, variant) and the identified model in every row.
+    """
+    data = get_data(file, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format)
+    t = (data.index - data.index[0]).total_seconds().to_numpy()
+    mv_values = data[mv].to_numpy(dtype=float)
+    pv_values = data[pv].to_numpy(dtype=float)
+
+    dx, t_step, tau_ob, t1_ob = guess_model(t, mv_values, pv_values)
+    fit = fit_model(t, pv_values, order, dx, tau_ob, t1_ob, t0=t_step, y0=frame_stats(data).loc[pv, "min"])
+    model = {"file": str(file), "mv": mv, "pv": pv, "order": order, "k_ob": fit.k_ob, "tau_ob": fit.tau_ob,
+             "t1_ob": fit.t1_ob, "t2_ob": fit.t2_ob, "r2": fit.r2}
+    return pd.DataFrame([{**model, **row} for row in tune_model(order, fit.k_ob, fit.tau_ob, fit.t1_ob, fit.t2_ob)])
+
+
+def _tune_job(job):
+    begin = time.perf_counter()
+    try:
+        return tune_file(**job), None, time.perf_counter() - begin
+    except Exception as error:  # one broken file must not stop the whole run
+        return None, f"{type(error).__name__}: {error}", time.perf_counter() - begin
+
+
+def read_manifest(path):
+    """
+    Jobs from a manifest .csv with columns file, mv, pv and optionally any tune_file option
+    (order, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format).
+    Relative file paths are resolved against the manifest folder.
+    """
+    manifest = pd.read_csv(path, dtype=str, keep_default_na=False)
+    folder = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for row in manifest.to_dict("records"):
+        job = {key: value for key, value in row.items() if value != ""}
+        for key in ("header_row", "skip_rows", "skip_columns"):
+            if key in job:
+                job[key] = int(job[key])
+        job["file"] = os.path.join(folder, job["file"])
+        jobs.append(job)
+    return jobs
+
+
+def directory_jobs(directory, mv, pv, **options):
+    """
+    One job per .csv file in `directory`, all with the same MV/PV columns and parse options.
+    """
+    return [{"file": os.path.join(directory, name), "mv": mv, "pv": pv, **options}
+            for name in sorted(os.listdir(directory)) if name.endswith(".csv")]
+
+
+def tune_files(jobs, workers=None, progress=None):
+    """
+    Run tune_file for every job on a process pool (all cores by default).
+    `progress(job, error, seconds, done, total)` is called as each file finishes.
+    Returns the concatenated results and a per-file report (file, seconds, error).
+    """
+    results, report = [], []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_tune_job, job): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            job = futures[future]
+            result, error, seconds = future.result()
+            if result is not None:
+                results.append(result)
+            report.append({"file": job["file"], "seconds": seconds, "error": error})
+            if progress:
+                progress(job, error, seconds, done, len(jobs))
+    return (pd.concat(results, ignore_index=True) if results else pd.DataFrame()), pd.DataFrame(report)
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache.
+    Bounded by number of entries and, optionally, by total size of stored values
+    (measured with `sizeof`). Shared between Streamlit sessions, so values must not be mutated by callers.
+    """
+
+    def __init__(self, max_entries=8, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self.hits = 0
+        self.misses = 0
+
+        self._items = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            if key in self._items:
+                self._bytes -= self._sizes.pop(key)
+                del self._items[key]
+            self._items[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            self._evict()
+
+    def get_or_compute(self, key, func):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+        value = func()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self):
+        return {"entries": len(self._items),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses}
+
+    def _evict(self):
+        # The newest entry is always kept, even if it alone exceeds max_bytes
+        while len(self._items) > 1 and (
+                len(self._items) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key, _ = self._items.popitem(last=False)
+            self._bytes -= self._sizes.pop(key)
@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .Bulk_Tuning import tune_model
+from .Simulation import parallel_gains, simulate_batch
+
+PROCESS_TYPES = ["Aperiodic process", "20% overshoot process", "Minimum I2 process"]  # by overshoot setting
+DISTURBANCE_TYPES = ["Setpoint disturbance", "Load disturbance"]  # by disturbance setting
+OPTION_MENUS = {"overshoot": ("Choose process type", PROCESS_TYPES),
+                "disturbance": ("Choose disturbance type", DISTURBANCE_TYPES)}  # option: label, name by value
+INDICES = {"IAE": "iae", "ISE": "ise", "ITAE": "itae", "Overshoot [%]": "overshoot",
+           "Settling time [s]": "settling_time", "Load IAE": "load_iae"}  # table column: SimulationResult field
+
+
+def _variant(overshoot, disturbance):
+    names = []
+    if overshoot is not None:
+        names.append(PROCESS_TYPES[overshoot])
+    if disturbance is not None:
+        names.append(DISTURBANCE_TYPES[disturbance])
+    return ", ".join(names)
+
+
+def _simulate_chunk(args):
+    model, gains = args
+    result = simulate_batch(*model, *gains, record=False)
+    return np.stack([getattr(result, field) for field in INDICES.values()] + [result.stable])
+
+
+def compare_methods(order, k_ob, tau_ob, t1_ob, t2_ob=None, pid=0, lamb=3.0, rank_by="IAE", workers=1):
+    """
+    Tune the model with every method (and method variant) applicable to `order` and PID type `pid`,
+    simulate all of them in closed loop and rank them by `rank_by` (a column of INDICES), unstable last.
+    Simulations are split across `workers` processes (None - all cores, 1 runs in-process).
+    Returns a DataFrame with method, variant, P, I [s], D [s], performance indices and stability.
+    """
+    rows = tune_model(order, k_ob, tau_ob, t1_ob, t2_ob, lamb=lamb, pids=(pid,))
+    table = pd.DataFrame({"Method": [row["method"] for row in rows],
+                          "Variant": [_variant(row["overshoot"], row["disturbance"]) for row in rows],
+                          "P": [row["p_pid"] for row in rows],
+                          "I [s]": [row["i_pid"] for row in rows],
+                          "D [s]": [row["d_pid"] for row in rows]})
+    if pid == 0:
+        table = table.drop(columns="D [s]")
+    gains = np.array([[row["p_pid"], row["i_pid"], row["d_pid"]] for row in rows], dtype=float).reshape(-1, 3)
+    valid = np.isfinite(gains[:, :2]).all(axis=1) & (gains[:, 1] > 0)
+    kp, ki, kd = parallel_gains(gains[valid, 0], gains[valid, 1], gains[valid, 2] if pid == 1 else None)
+    model = (k_ob, tau_ob, t1_ob, t2_ob if order != "1st Order" else None)
+
+    indices = np.full((len(INDICES) + 1, len(table)), np.inf)
+    indices[-1] = 0
+    if valid.any():
+        workers = workers or os.cpu_count() or 1
+        chunks = [(model, part) for part in zip(*(np.array_split(gain, min(workers, len(kp)))
+                                                   for gain in (kp, ki, kd)))]
+        if workers == 1 or len(chunks) < 2:
+            parts = list(map(_simulate_chunk, chunks))
+        else:
+            with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+                parts = list(executor.map(_simulate_chunk, chunks))
+        indices[:, valid] = np.concatenate(parts, axis=1)
+
+    for column, values in zip(INDICES, indices):
+        table[column] = values
+    table["Stable"] = indices[-1].astype(bool)
+    table = table.sort_values(["Stable", rank_by], ascending=[False, True], kind="stable", ignore_index=True)
+    table.index = pd.RangeIndex(1, len(table) + 1, name="Rank")
+    return table
@@ -0,0 +1,433 @@
+import hashlib
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+from .Cache import LRUCache
+
+MAX_CACHED_FRAMES = 4
+MAX_CACHED_BYTES = 2 * 1024 ** 3  # 2 GB
+CHUNK_ROWS = 200_000
+
+CACHE_DIR = os.environ.get("PID_TUNER_CACHE_DIR",
+                           os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".pid_cache"))
+CACHE_VERSION = 3  # bump when parsing changes, old files are dropped on the next write
+MAX_DISK_CACHE_BYTES = 5 * 1024 ** 3  # 5 GB
+MAX_DISK_CACHE_AGE = 30 * 24 * 3600  # unused entries are dropped after 30 days
+
+
+def frame_size(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+frame_cache = LRUCache(max_entries=MAX_CACHED_FRAMES, max_bytes=MAX_CACHED_BYTES, sizeof=frame_size)
+
+
+def content_hash(source):
+    digest = hashlib.sha1()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            for block in iter(lambda: file.read(1024 ** 2), b""):
+                digest.update(block)
+    elif isinstance(source, io.BytesIO):
+        digest.update(source.getbuffer())
+    else:
+        position = source.tell()
+        source.seek(0)
+        digest.update(source.read())
+        source.seek(position)
+    return digest.hexdigest()
+
+
+def source_key(source):
+    """
+    Identity of a data source.
+    Path, size and modification time for files on disk, content hash for uploaded (file-like) objects.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        stat = os.stat(source)
+        return "path", os.path.abspath(source), stat.st_size, stat.st_mtime_ns
+    return "upload", content_hash(source)
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def compact(frame):
+    """
+    Shrink frame in place: repeated text values are stored as categories.
+    Numeric columns keep their dtype, a narrower integer type would wrap around in arithmetic.
+    """
+    for column in frame.columns:
+        series = frame[column]
+        if series.dtype == object and len(series) and series.nunique() < 0.5 * len(series):
+            frame[column] = series.astype("category")
+    return frame
+
+
+FIXED_WIDTH_FIELDS = {"%Y": 4, "%m": 2, "%d": 2, "%H": 2, "%M": 2, "%S": 2}
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def fixed_width_layout(date_format):
+    """
+    Byte positions of every field in a fixed-width format such as "%d.%m.%Y %H:%M:%S".
+    Returns (fields, separators, width) or None if the format has variable-width directives.
+    """
+    fields, separators = {}, {}
+    position = i = 0
+    while i < len(date_format):
+        if date_format[i] == "%":
+            code = date_format[i:i + 2]
+            if code not in FIXED_WIDTH_FIELDS or code in fields:
+                return None
+            fields[code] = (position, position + FIXED_WIDTH_FIELDS[code])
+            position += FIXED_WIDTH_FIELDS[code]
+            i += 2
+        else:
+            separators[position] = ord(date_format[i])
+            position += 1
+            i += 1
+    if not {"%Y", "%m", "%d"} <= fields.keys():
+        return None
+    return fields, separators, position
+
+
+def _parse_fixed_width(values, fields, separators, width):
+    try:
+        raw = values.astype(f"S{width + 1}")
+    except (UnicodeEncodeError, ValueError, TypeError):
+        return None
+    codes = np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(len(values), width + 1)
+    if codes[:, width].any():  # longer than the format
+        return None
+    for position, char in separators.items():
+        if not (codes[:, position] == char).all():
+            return None
+    parts = {}
+    for code, (begin, end) in fields.items():
+        block = codes[:, begin:end] - np.uint8(ord("0"))  # non-digits wrap around above 9
+        if (block > 9).any():
+            return None
+        value = np.zeros(len(values), dtype=np.int64)
+        for column in range(end - begin):
+            value = value * 10 + block[:, column]
+        parts[code] = value
+
+    year, month, day = parts["%Y"], parts["%m"], parts["%d"]
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    if ((month < 1) | (month > 12)).any():
+        return None
+    if ((day < 1) | (day > DAYS_IN_MONTH[month - 1] + ((month == 2) & leap))).any():
+        return None
+
+    # Days since epoch from the civil date (H. Hinnant's algorithm)
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    seconds = (era * 146097 + day_of_era - 719468) * 86400
+    for code, scale, limit in (("%H", 3600, 24), ("%M", 60, 60), ("%S", 1, 60)):
+        if code in parts:
+            if (parts[code] >= limit).any():
+                return None
+            seconds += parts[code] * scale
+    return seconds.astype("datetime64[s]").astype("datetime64[ns]")
+
+
+def parse_datetime(values, date_format):
+    """
+    Vectorized datetime parsing with an explicit format.
+    Fixed-width numeric layouts are decoded straight from the bytes, everything else goes through pd.to_datetime.
+    """
+    values = np.asarray(values)
+    layout = fixed_width_layout(date_format)
+    if layout is not None and len(values):
+        parsed = _parse_fixed_width(values, *layout)
+        if parsed is not None:
+            return pd.DatetimeIndex(parsed)
+    return pd.DatetimeIndex(pd.to_datetime(values, format=date_format))
+
+
+def sample_interval(index):
+    """
+    Sampling interval in seconds detected from a datetime index as the median positive step,
+    so gaps, duplicates and unsorted rows do not distort it.
+    """
+    steps = np.diff(np.asarray(index, dtype="datetime64[ns]").view(np.int64))
+    steps = steps[steps > 0]
+    if not len(steps):
+        raise ValueError("Cannot detect sampling interval")
+    return max(1, int(round(np.median(steps) / 1e9)))
+
+
+STATS = ["min", "max", "first_valid", "last_valid", "nan_count"]
+
+
+def column_stats(frame):
+    """
+    Statistics index of the numeric columns built in one vectorized pass over the values:
+    min, max, first/last valid row position (-1 if none) and NaN count per column.
+    """
+    numeric = frame.select_dtypes("number")
+    values = numeric.to_numpy(dtype=float)
+    if not len(values):
+        values = np.full((1, values.shape[1]), np.nan)  # an empty frame reads as one all-NaN row
+    valid = ~np.isnan(values)
+    found = valid.any(axis=0)
+    return pd.DataFrame({"min": np.fmin.reduce(values, axis=0),
+                         "max": np.fmax.reduce(values, axis=0),
+                         "first_valid": np.where(found, valid.argmax(axis=0), -1),
+                         "last_valid": np.where(found, len(values) - 1 - valid[::-1].argmax(axis=0), -1),
+                         "nan_count": len(numeric) - valid.sum(axis=0)},
+                        index=numeric.columns, columns=STATS)
+
+
+def with_stats(frame):
+    """
+    Attach the statistics index (frame.attrs["stats"], read with frame_stats) and the sampling interval of a datetime
+    index (frame.attrs["interval"], None if it cannot be detected) so they are cached together with the data.
+    attrs hold plain tuples only: pandas compares attrs with == when combining frames (concat, melt).
+    """
+    frame.attrs["stats"] = tuple(column_stats(frame).itertuples(name=None))
+    try:
+        frame.attrs["interval"] = sample_interval(frame.index) if isinstance(frame.index, pd.DatetimeIndex) else None
+    except ValueError:
+        frame.attrs["interval"] = None
+    return frame
+
+
+def frame_stats(frame):
+    """
+    Statistics index attached by with_stats as a DataFrame (columns STATS, one row per numeric column).
+    """
+    rows = frame.attrs["stats"]
+    return pd.DataFrame([row[1:] for row in rows], index=pd.Index([row[0] for row in rows]), columns=STATS)
+
+
+def read_csv(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format):
+    if skip_rows | skip_columns:
+        ncols = len(pd.read_csv(_rewind(source), sep=separator, decimal=decimal_sep, nrows=1).columns)
+        if date_format:
+            frame = pd.read_csv(_rewind(source),
+                                sep=separator,
+                                decimal=decimal_sep,
+                                header=header_row,
+                                index_col=0,
+                                usecols=range(skip_columns, ncols),
+                                skiprows=range(header_row + 1, header_row + skip_rows + 1)
+                                )
+        else:
+            return pd.read_csv(_rewind(source),
+                               sep=separator,
+                               decimal=decimal_sep,
+                               header=header_row,
+                               usecols=range(skip_columns, ncols),
+                               skiprows=range(header_row + 1, header_row + skip_rows + 1)
+                               )
+    else:
+        frame = pd.read_csv(_rewind(source),
+                            sep=separator,
+                            decimal=decimal_sep,
+                            header=header_row,
+                            index_col=0
+                            )
+    if date_format:
+        frame.index = parse_datetime(frame.index.to_numpy(), date_format).rename(frame.index.name)
+    return frame
+
+
+def _cache_path(identity, options):
+    key = repr((identity, options)).encode()
+    return os.path.join(CACHE_DIR, f"v{CACHE_VERSION}-{hashlib.sha1(key).hexdigest()}.feather")
+
+
+def prune_disk_cache(max_bytes=MAX_DISK_CACHE_BYTES, max_age=MAX_DISK_CACHE_AGE):
+    """
+    Drop entries of older cache versions and entries unused for `max_age` seconds,
+    then least recently used ones until the cache fits in `max_bytes`.
+    """
+    try:
+        entries = [entry for entry in os.scandir(CACHE_DIR) if entry.name.endswith(".feather")]
+    except FileNotFoundError:
+        return
+    now = time.time()
+    kept = []
+    for entry in entries:
+        stat = entry.stat()
+        if not entry.name.startswith(f"v{CACHE_VERSION}-") or now - stat.st_mtime > max_age:
+            os.remove(entry.path)
+        else:
+            kept.append((stat.st_mtime, stat.st_size, entry.path))
+    kept.sort()
+    total = sum(size for _, size, _ in kept)
+    for _, size, path in kept:
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+def _read_cached(path):
+    frame = feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+    os.utime(path)  # mark as recently used
+    return frame
+
+
+def _write_cached(path, frame):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        feather.write_feather(pa.Table.from_pandas(frame, preserve_index=True), temp_path, compression="uncompressed")
+        os.replace(temp_path, path)
+        prune_disk_cache()
+    except OSError:
+        pass  # cache is an optimization only, e.g. read-only installation
+
+
+def load_frame(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format, identity=None):
+    """
+    Parsed frame from the on-disk Feather cache (memory-mapped), parsing the .csv and filling the cache on a miss.
+    Entries are keyed by the source identity (see source_key, computed if not given) and parse options,
+    so edited files never hit stale entries.
+    """
+    options = (separator, decimal_sep, header_row, skip_rows, skip_columns, date_format)
+    path = _cache_path(source_key(source) if identity is None else identity, options)
+    try:
+        return _read_cached(path)
+    except (OSError, pa.ArrowInvalid):
+        pass
+    frame = compact(read_csv(source, *options))
+    _write_cached(path, frame)
+    return frame
+
+
+def get_data(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format):
+    """
+    Parse .csv once per (file identity, parse options) and serve later calls from memory,
+    falling back to the on-disk cache before parsing text again.
+    `source` is a path or an uploaded file object. Returned frame is a shallow copy,
+    so replacing its index or columns does not touch the cached one.
+    """
+    identity = source_key(source)  # hashes uploads, once for both caches
+    key = (identity, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format)
+    frame = frame_cache.get_or_compute(key, lambda: with_stats(load_frame(source, *key[1:], identity=identity)))
+    return frame.copy(deep=False)
+
+
+def read_columns(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format):
+    """
+    Data column names as get_data would return them, read from the header line only.
+    """
+    names = list(pd.read_csv(_rewind(source), sep=separator, decimal=decimal_sep, header=header_row, nrows=0).columns)
+    if date_format or not (skip_rows | skip_columns):
+        return names[skip_columns + 1:]
+    return names[skip_columns:]
+
+
+def iter_chunks(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format, columns,
+                chunk_rows=CHUNK_ROWS):
+    """
+    Stream .csv in chunks of `chunk_rows`, parsing only `columns` and the datetime column.
+    Chunks are indexed by datetime if `date_format` is set, otherwise by row number.
+    """
+    columns = list(dict.fromkeys(columns))
+    names = list(pd.read_csv(_rewind(source), sep=separator, decimal=decimal_sep, header=header_row, nrows=0).columns)
+    time_column = names[skip_columns] if date_format else None
+    usecols = [time_column] + columns if time_column else columns
+    with pd.read_csv(_rewind(source),
+                     sep=separator,
+                     decimal=decimal_sep,
+                     header=header_row,
+                     usecols=usecols,
+                     skiprows=range(header_row + 1, header_row + skip_rows + 1),
+                     chunksize=chunk_rows
+                     ) as reader:
+        row = 0
+        for chunk in reader:
+            if time_column:
+                index = parse_datetime(chunk[time_column].to_numpy(), date_format).rename(time_column)
+            else:
+                index = pd.RangeIndex(row, row + len(chunk))
+            row += len(chunk)
+            yield chunk[columns].set_axis(index)
+
+
+def _read_range(chunks, start, end):
+    window = []
+    for chunk in chunks:
+        if end is not None and chunk.index[0] > end:
+            break
+        mask = np.ones(len(chunk), dtype=bool)
+        if start is not None:
+            mask &= chunk.index >= start
+        if end is not None:
+            mask &= chunk.index <= end
+        window.append(chunk[mask])
+    return pd.concat(window) if window else pd.DataFrame()
+
+
+def _read_step_window(chunks, mv_chunks, mv, before, after):
+    low, high = np.inf, -np.inf
+    for chunk in mv_chunks:
+        low, high = min(low, chunk[mv].min()), max(high, chunk[mv].max())
+    threshold = 0.5 * (high - low)  # same step criterion as the Model Fitting section
+
+    kept, window = [], []
+    step = previous = None
+    for chunk in chunks:
+        if step is None:
+            values = chunk[mv].to_numpy(dtype=float)
+            diff = np.diff(values, prepend=np.nan if previous is None else previous)
+            previous = values[-1]
+            hits = np.flatnonzero(diff >= threshold)
+            kept.append(chunk)
+            if not len(hits):
+                while len(kept) > 1 and kept[1].index[0] <= chunk.index[-1] - before:
+                    kept.pop(0)
+                continue
+            step = chunk.index[hits[0]]
+            head = pd.concat(kept)
+            kept = None
+            window.append(head[(head.index >= step - before) & (head.index <= step + after)])
+        else:
+            window.append(chunk[chunk.index <= step + after])
+        if chunk.index[-1] > step + after:
+            break
+    if step is None:
+        raise IndexError("No MV step found")
+    return pd.concat(window)
+
+
+def read_window(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format, columns,
+                start=None, end=None, before=600, after=3600, chunk_rows=CHUNK_ROWS):
+    """
+    Streaming load of large files: only `columns` (MV first) and the datetime column are parsed, chunk by chunk.
+    Keeps rows between `start` and `end` if either is given, otherwise `before`/`after` around the first MV step
+    (seconds with datetime column, rows without). The full table is never materialized.
+    """
+    options = (source, separator, decimal_sep, header_row, skip_rows, skip_columns)
+    key = ("window", source_key(source), *options[1:], date_format, tuple(columns), start, end, before, after)
+
+    def load():
+        chunks = iter_chunks(*options, date_format, columns, chunk_rows)
+        if start is not None or end is not None:
+            return _read_range(chunks,
+                               pd.Timestamp(start) if date_format and start is not None else start,
+                               pd.Timestamp(end) if date_format and end is not None else end)
+        mv_chunks = iter_chunks(*options, None, columns[:1], chunk_rows)
+        if date_format:
+            return _read_step_window(chunks, mv_chunks, columns[0], pd.Timedelta(seconds=before),
+                                     pd.Timedelta(seconds=after))
+        return _read_step_window(chunks, mv_chunks, columns[0], before, after)
+
+    return frame_cache.get_or_compute(key, lambda: with_stats(compact(load()))).copy(deep=False)
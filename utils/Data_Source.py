@@ -0,0 +1,185 @@
+import time
+from math import exp
+
+import numpy as np
+import pandas as pd
+
+from .Batch_Identification import _initial_guess
+from .Data_Loader import CHUNK_ROWS, iter_chunks
+from .Identification import fit_model
+
+LIVE_CAPACITY = 20_000  # samples kept in the live ring buffer
+MIN_FIT_SAMPLES = 10  # samples after the MV step before the first fit
+BASELINE_SAMPLES = 20  # PV samples before the MV step averaged into the steady state
+WARM_START_R2 = 0.9  # poorer fits (e.g. made inside the dead time) are not used as the next starting point
+
+
+class RingBuffer:
+    """
+    The latest `capacity` rows of (t [s], MV, PV) samples in a preallocated array.
+    """
+    def __init__(self, capacity=LIVE_CAPACITY, width=3):
+        self.data = np.full((capacity, width), np.nan)
+        self.count = 0  # samples ever appended
+
+    def __len__(self):
+        return min(self.count, len(self.data))
+
+    def extend(self, rows):
+        rows = np.asarray(rows, dtype=float).reshape(-1, self.data.shape[1])
+        appended = len(rows)
+        rows = rows[-len(self.data):]
+        self.data[(self.count + appended - len(rows) + np.arange(len(rows))) % len(self.data)] = rows
+        self.count += appended
+
+    def view(self, since=0):
+        """
+        Buffered rows in arrival order, starting from sample number `since` (or the oldest one still kept).
+        """
+        first = max(since, self.count - len(self.data), 0)
+        positions = np.arange(first, self.count) % len(self.data)
+        return self.data[positions]
+
+
+class DataSource:
+    """
+    Source of live samples. read() returns the samples that arrived since the previous call as
+    (t [s], MV, PV) arrays; PLC/historian clients (OPC UA, Modbus) plug in by implementing read().
+    """
+    def __init__(self, dt=1.0, speed=1.0):
+        self.dt = dt  # sampling interval [s]
+        self.speed = speed  # samples are produced `speed` times faster than real time
+        self._clock = time.monotonic()
+
+    def _due(self, count):
+        """
+        Number of samples to produce: `count` if given, otherwise the ones due by the wall clock.
+        """
+        if count is None:
+            count = int((time.monotonic() - self._clock) * self.speed / self.dt)
+        self._clock += count * self.dt / self.speed
+        return count
+
+    def read(self, count=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SimulatedPlant(DataSource):
+    """
+    Local FOPDT/SOPDT plant for offline bump tests: MV is set with set_mv(), PV follows
+    K e^(-tau s) / ((T1 s + 1)(T2 s + 1)) around `pv` with optional measurement noise.
+    """
+    def __init__(self, order, k_ob, tau_ob, t1_ob, t2_ob=None, dt=1.0, mv=0.0, pv=0.0, noise=0.0, speed=1.0,
+                 seed=None):
+        super().__init__(dt, speed)
+        self.k_ob = k_ob
+        self.a1 = exp(-dt / t1_ob) if t1_ob > 0 else 0.0
+        self.a2 = exp(-dt / t2_ob) if order != "1st Order" and t2_ob else None
+        self.delay = np.full(round(tau_ob / dt) + 1, float(mv))  # MV samples on their way through the dead time
+        self.mv = float(mv)
+        self.mv0, self.pv0 = float(mv), float(pv)
+        self.x1 = self.x2 = 0.0
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.step = 0
+
+    def set_mv(self, value):
+        self.mv = float(value)
+
+    def read(self, count=None):
+        count = self._due(count)
+        t, mv, pv = np.empty(count), np.full(count, self.mv), np.empty(count)
+        for sample in range(count):
+            t[sample] = self.step * self.dt
+            pv[sample] = self.pv0 + self.x2
+            self.delay[self.step % len(self.delay)] = self.mv
+            delayed = self.delay[(self.step + 1) % len(self.delay)]
+            self.x1 = self.a1 * self.x1 + (1 - self.a1) * self.k_ob * (delayed - self.mv0)
+            self.x2 = self.x1 if self.a2 is None else self.a2 * self.x2 + (1 - self.a2) * self.x1
+            self.step += 1
+        if self.noise:
+            pv += self.rng.normal(0.0, self.noise, count)
+        return t, mv, pv
+
+
+class CsvReplay(DataSource):
+    """
+    Replay MV/PV columns of a historian .csv as a live source, streamed chunk by chunk.
+    """
+    def __init__(self, source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format, mv, pv,
+                 dt=1.0, speed=1.0, chunk_rows=CHUNK_ROWS):
+        super().__init__(dt, speed)
+        self.mv, self.pv = mv, pv
+        self.chunks = iter_chunks(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format,
+                                  [mv, pv], chunk_rows)
+        self.pending = np.empty((0, 3))
+        self.start = None
+        self.row = 0
+
+    def read(self, count=None):
+        count = self._due(count)
+        while len(self.pending) < count:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            if self.start is None:
+                self.start = chunk.index[0]
+            if isinstance(chunk.index, pd.DatetimeIndex):
+                t = (chunk.index - self.start).total_seconds().to_numpy()
+            else:
+                t = (np.arange(len(chunk)) + self.row) * self.dt
+            self.row += len(chunk)
+            self.pending = np.concatenate((self.pending, np.column_stack((t, chunk[self.mv], chunk[self.pv]))))
+        rows, self.pending = self.pending[:count], self.pending[count:]
+        return rows[:, 0], rows[:, 1], rows[:, 2]
+
+    def close(self):
+        self.chunks.close()
+
+
+class LiveIdentification:
+    """
+    Model of the latest MV step, refitted as samples arrive. Samples go to a ring buffer, only the new
+    samples are scanned for an MV step and each fit is warm-started from the previous one.
+    """
+    def __init__(self, order, threshold=0.0, capacity=LIVE_CAPACITY, min_samples=MIN_FIT_SAMPLES):
+        self.order = order
+        self.threshold = threshold
+        self.buffer = RingBuffer(capacity)
+        self.min_samples = min_samples
+        self.step = None  # sample number of the latest MV step
+        self.dx = None
+        self.y0 = None
+        self.fit = None
+
+    def update(self, t, mv, pv):
+        """
+        Append new samples and refit; returns the latest FitResult (None until a step has settled in).
+        """
+        if not len(t):
+            return self.fit
+        previous = self.buffer.view(self.buffer.count - 1)
+        before = previous[0, 1] if len(previous) else mv[0]
+        hits = np.flatnonzero(np.abs(np.diff(np.concatenate(([before], mv)))) > self.threshold)
+        if len(hits):
+            step = hits[-1]
+            history = np.concatenate((self.buffer.view(self.buffer.count - BASELINE_SAMPLES)[:, 2], pv[:step]))
+            self.step = self.buffer.count + step
+            self.dx = float(mv[step] - (mv[step - 1] if step else before))
+            self.y0 = float(np.median(history[-BASELINE_SAMPLES:])) if len(history) else float(pv[step])
+            self.fit = None
+        self.buffer.extend(np.column_stack((t, mv, pv)))
+
+        if self.step is None or self.buffer.count - self.step < self.min_samples:
+            return self.fit
+        t_all, _, pv_all = self.buffer.view(self.step).T
+        if self.fit is None or self.fit.r2 < WARM_START_R2:
+            tau_ob, t1_ob = _initial_guess(t_all, pv_all, t_all[0], self.y0)
+            t2_ob = None
+        else:
+            tau_ob, t1_ob, t2_ob = self.fit.tau_ob, self.fit.t1_ob, self.fit.t2_ob
+        self.fit = fit_model(t_all, pv_all, self.order, self.dx, tau_ob, t1_ob, t2_ob, t0=t_all[0], y0=self.y0)
+        return self.fit
@@ -0,0 +1,29 @@
+import numpy as np
+
+CHART_POINTS = 2_000  # rows sent to the browser per chart, about twice the chart width in pixels
+
+
+def chart_positions(values, points=CHART_POINTS, begin=0, end=None):
+    """
+    Row positions that draw `values[begin:end]` (one column per series) with about `points` rows:
+    the window is split into equal buckets and the first/last row plus the minimum and maximum of every
+    series in each bucket are kept, so peaks and steps survive decimation.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    end = len(values) if end is None else min(end, len(values))
+    n = end - begin
+    if n <= points:
+        return np.arange(begin, max(end, begin))
+
+    buckets = max(1, points // (2 * values.shape[1]))
+    size = -(-n // buckets)
+    window = values[begin:end]
+    pad = ((0, buckets * size - n), (0, 0))
+    low = np.pad(np.where(np.isnan(window), np.inf, window), pad, mode="edge").reshape(buckets, size, -1)
+    high = np.pad(np.where(np.isnan(window), -np.inf, window), pad, mode="edge").reshape(buckets, size, -1)
+    offsets = np.arange(buckets)[:, None] * size
+    positions = np.concatenate(([0, n - 1], (low.argmin(axis=1) + offsets).ravel(),
+                                (high.argmax(axis=1) + offsets).ravel()))
+    return np.unique(np.minimum(positions, n - 1)) + begin
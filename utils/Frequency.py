@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .Simulation import DERIVATIVE_FILTER, parallel_gains
+
+FREQUENCY_POINTS = 500  # log-spaced frequencies per model
+FREQUENCY_DECADES = (-3, 2)  # grid from 1e-3 to 1e2 times 1 / (tau + T1 + T2)
+REFINE_STEPS = 40  # bisection steps refining each crossing between grid points
+PEAK_ZOOMS = 4  # rounds of local regridding around the sensitivity peak
+
+
+@dataclass(frozen=True)
+class StabilityMargins:
+    gain_margin: float  # ratio, inf if the phase never reaches -180°
+    phase_margin: float  # degrees, inf if |L| never crosses 1
+    ms: float  # maximum sensitivity max |1 / (1 + L)|
+    gain_crossover: float  # [rad/s] |L| = 1, NaN if none
+    phase_crossover: float  # [rad/s] phase = -180°, NaN if none
+    ms_frequency: float  # [rad/s]
+
+
+def frequency_grid(tau_ob, t1_ob, t2_ob=None, points=FREQUENCY_POINTS):
+    """
+    Log-spaced angular frequencies [rad/s] scaled to the model's tau + T1 + T2 (last axis).
+    """
+    scale = np.asarray(tau_ob, dtype=float) + np.asarray(t1_ob, dtype=float) + np.nan_to_num(
+        np.asarray(0.0 if t2_ob is None else t2_ob, dtype=float))
+    return np.logspace(*FREQUENCY_DECADES, points) / np.asarray(scale)[..., None]
+
+
+def open_loop(w, k_ob, tau_ob, t1_ob, t2_ob, kp, ki, kd):
+    """
+    L(jω) = C(jω) G(jω) of parallel PID (derivative filtered as in simulate_batch) and
+    K e^(-tau s) / ((T1 s + 1)(T2 s + 1)) with exact dead time, together with its continuous phase [rad]
+    (summed from the factors, so the dead time phase is not wrapped). Parameters broadcast against `w`.
+    """
+    k, tau, t1, kp, ki, kd = (np.asarray(value, dtype=float) for value in (k_ob, tau_ob, t1_ob, kp, ki, kd))
+    t2 = 0.0 if t2_ob is None else np.nan_to_num(np.asarray(t2_ob, dtype=float))
+    s = 1j * np.asarray(w, dtype=float)
+    tf = np.where(kp != 0, np.abs(kd / np.where(kp != 0, kp, 1)) / DERIVATIVE_FILTER, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        controller = kp + ki / s + kd * s / (tf * s + 1)
+        lags = (t1 * s + 1) * (t2 * s + 1)
+        loop = controller * k * np.exp(-s * tau) / lags
+        phase = np.angle(controller * np.sign(k)) - s.imag * tau - np.arctan(s.imag * t1) - np.arctan(s.imag * t2)
+    return loop, phase
+
+
+def max_sensitivity(k_ob, tau_ob, t1_ob, t2_ob, kp, ki, kd, points=FREQUENCY_POINTS):
+    """
+    Peak of |1 / (1 + L(jω))| on the frequency grid, vectorized over models (arrays broadcast against each other).
+    Says nothing about stability on its own (see simulate_batch or stability_margins).
+    """
+    k, tau, t1, kp, ki, kd = np.broadcast_arrays(*(np.atleast_1d(np.asarray(value, dtype=float))
+                                                   for value in (k_ob, tau_ob, t1_ob, kp, ki, kd)))
+    t2 = None if t2_ob is None else np.broadcast_to(np.asarray(t2_ob, dtype=float), t1.shape)
+    w = frequency_grid(tau, t1, t2, points)
+    loop, _ = open_loop(w, *(None if value is None else value[..., None] for value in (k, tau, t1, t2, kp, ki, kd)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.max(np.abs(1 / (1 + loop)), axis=-1)
+
+
+def _refine(f, low, high):
+    """
+    Roots of f (vectorized over brackets) between `low` and `high` frequencies where f changes sign,
+    by bisection in log frequency.
+    """
+    f_low = f(low)
+    for _ in range(REFINE_STEPS):
+        middle = np.sqrt(low * high)
+        f_middle = f(middle)
+        left = np.sign(f_middle) == np.sign(f_low)
+        low, f_low = np.where(left, middle, low), np.where(left, f_middle, f_low)
+        high = np.where(left, high, middle)
+    return np.sqrt(low * high)
+
+
+def stability_margins(k_ob, tau_ob, t1_ob, t2_ob, kp, ki, kd, points=FREQUENCY_POINTS):
+    """
+    Gain and phase margins, maximum sensitivity and crossover frequencies of one loop (see open_loop).
+    Every crossing found on the grid is refined by bisection; with several crossings the smallest margin counts.
+    """
+    model = (k_ob, tau_ob, t1_ob, t2_ob, kp, ki, kd)
+    w = frequency_grid(tau_ob, t1_ob, t2_ob, points)
+    loop, phase = open_loop(w, *model)
+
+    gain = np.log(np.abs(loop))
+    brackets = np.flatnonzero(np.sign(gain[:-1]) != np.sign(gain[1:]))
+    crossover = _refine(lambda f: np.log(np.abs(open_loop(f, *model)[0])), w[brackets], w[brackets + 1])
+    phase_margins = np.degrees(np.pi + open_loop(crossover, *model)[1])
+
+    wrapped = (phase + np.pi) / (2 * np.pi)  # an integer where the phase is -180° - n 360°
+    brackets = np.flatnonzero(np.floor(wrapped[:-1]) != np.floor(wrapped[1:]))
+    target = np.maximum(np.floor(wrapped[brackets]), np.floor(wrapped[brackets + 1]))
+    phase_crossover = _refine(lambda f: (open_loop(f, *model)[1] + np.pi) / (2 * np.pi) - target, w[brackets],
+                              w[brackets + 1])
+    gain_margins = 1 / np.abs(open_loop(phase_crossover, *model)[0])
+
+    sensitivity = np.abs(1 / (1 + loop))
+    peak = int(np.argmax(sensitivity))
+    for _ in range(PEAK_ZOOMS):
+        local = np.logspace(np.log10(w[max(peak - 1, 0)]), np.log10(w[min(peak + 1, len(w) - 1)]), 50)
+        w, sensitivity = local, np.abs(1 / (1 + open_loop(local, *model)[0]))
+        peak = int(np.argmax(sensitivity))
+
+    pm_index = int(np.argmin(phase_margins)) if len(phase_margins) else None
+    gm_index = int(np.argmin(gain_margins)) if len(gain_margins) else None
+    return StabilityMargins(
+        gain_margin=float(gain_margins[gm_index]) if gm_index is not None else np.inf,
+        phase_margin=float(phase_margins[pm_index]) if pm_index is not None else np.inf,
+        ms=float(sensitivity[peak]),
+        gain_crossover=float(crossover[pm_index]) if pm_index is not None else np.nan,
+        phase_crossover=float(phase_crossover[gm_index]) if gm_index is not None else np.nan,
+        ms_frequency=float(w[peak]))
+
+
+def _loop(obj, p, i, d, form):
+    if p is None:
+        p, i, d = obj.p_pid, obj.i_pid, obj.d_pid if obj.pid == 1 else None
+    t2 = obj.t2_ob if obj.order != "1st Order" else None
+    return (obj.k_ob, obj.tau_ob, obj.t1_ob, t2, *parallel_gains(p, i, d, form))
+
+
+def loop_margins(obj, p=None, i=None, d=None, form="standard", points=FREQUENCY_POINTS):
+    """
+    stability_margins of PID_Object `obj` (its model and, unless given, its standard form P/I/D);
+    settings given in `form` (see PID_FORMS) are converted first.
+    """
+    return stability_margins(*_loop(obj, p, i, d, form), points=points)
+
+
+def frequency_response(obj, p=None, i=None, d=None, form="standard", points=FREQUENCY_POINTS):
+    """
+    Open loop L(jω) of PID_Object `obj` on the frequency grid, for Bode and Nyquist plots:
+    DataFrame of w (ω [rad/s]), magnitude [dB], continuous phase [deg], re and im parts.
+    """
+    model = _loop(obj, p, i, d, form)
+    w = frequency_grid(model[1], model[2], model[3], points)
+    loop, phase = open_loop(w, *model)
+    return pd.DataFrame({"w": w, "magnitude": 20 * np.log10(np.abs(loop)), "phase": np.degrees(phase),
+                         "re": loop.real, "im": loop.imag})
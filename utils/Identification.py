@@ -0,0 +1,169 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .Model_Response import step_response
+
+MAX_FIT_SAMPLES = 2_000  # longer records are strided for the search, final quality uses all samples
+MAX_BLOCK_ELEMENTS = 4_000_000  # candidates x samples evaluated at once
+GRID = np.array([-2, -1, 0, 1, 2])
+FIT_HORIZON = 10  # samples later than this many (tau + T) guesses after the step are ignored
+MIN_SNR = 3  # correlation peaks within this many noise deviations get zero confidence
+TARGET_SNR = 10  # the correlation is smoothed until its peak is this many noise deviations high
+
+
+@dataclass(frozen=True)
+class FitResult:
+    order: str
+    k_ob: float
+    tau_ob: float
+    t1_ob: float
+    t2_ob: float | None
+    y0: float
+    rmse: float
+    r2: float
+
+
+def _sse(t, pv, order, tau, t1, t2, y0):
+    """
+    Sum of squared errors of every candidate (tau, t1, t2) with the gain (and offset if `y0` is None)
+    solved by linear least squares. Returns (sse, gain, offset) arrays.
+    """
+    n = len(t)
+    sse, gain, offset = np.empty(len(tau)), np.empty(len(tau)), np.empty(len(tau))
+    block = max(1, MAX_BLOCK_ELEMENTS // n)
+    for begin in range(0, len(tau), block):
+        part = slice(begin, begin + block)
+        g = step_response(t, order, 1.0, tau[part, None], t1[part, None],
+                          None if t2 is None else t2[part, None])
+        sg, sgg = g.sum(axis=1), np.einsum("ij,ij->i", g, g)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if y0 is None:
+                sy, syy, sgy = pv.sum(), pv @ pv, g @ pv
+                det = n * sgg - sg ** 2
+                a = (n * sgy - sg * sy) / det
+                b = (sy - a * sg) / n
+                sse[part] = syy - a * sgy - b * sy
+                gain[part], offset[part] = a, b
+            else:
+                dy = pv - y0
+                a = (g @ dy) / sgg
+                sse[part] = dy @ dy - a * (g @ dy)
+                gain[part], offset[part] = a, y0
+    sse[~np.isfinite(sse)] = np.inf
+    return sse, gain, offset
+
+
+def fit_model(t, pv, order, dx, tau_ob, t1_ob, t2_ob=None, t0=0.0, y0=None, tol=1e-3, max_iter=60):
+    """
+    Least-squares fit of a process model (1st or 2nd order plus dead time) to the measured PV.
+    `t` is the time grid [s] of `pv`, `t0` the time of the MV step of size `dx`.
+    Search starts from the heuristic guesses `tau_ob`, `t1_ob` (`t2_ob`) and shrinks a grid
+    around the best candidate; gain (and `y0` offset if not given) are solved exactly for each candidate.
+    Quality (RMSE, R²) is computed over all samples within the fit horizon.
+    """
+    second = order == "2nd Order T1 != T2"
+    t = np.asarray(t, dtype=float) - t0
+    pv = np.asarray(pv, dtype=float)
+    t1_ob = max(float(t1_ob), max(t[-1], 1.0) * 1e-4)
+    if second:
+        t2_ob = float(t2_ob) if t2_ob and t2_ob != t1_ob else 0.3 * t1_ob
+
+    # Only the transient carries information: drop the far steady state, then stride to MAX_FIT_SAMPLES
+    horizon = FIT_HORIZON * (max(float(tau_ob), 0.0) + t1_ob + (t2_ob if second else 0.0))
+    valid = np.isfinite(pv) & (t <= horizon)
+    t, pv = t[valid], pv[valid]
+    stride = max(1, -(-len(t) // MAX_FIT_SAMPLES))
+    t_fit, pv_fit = t[::stride], pv[::stride]
+    best = np.array([max(float(tau_ob), 0.0), np.log(t1_ob)] + ([np.log(t2_ob)] if second else []))
+
+    scale = 0.5
+    tau_step = 0.25 * (best[0] + t1_ob)
+    for _ in range(max_iter):
+        axes = [best[0] + GRID * tau_step * scale] + [value + GRID * scale for value in best[1:]]
+        grid = np.stack([axis.ravel() for axis in np.meshgrid(*axes, indexing="ij")], axis=1)
+        grid = grid[grid[:, 0] >= 0]
+        sse, _, _ = _sse(t_fit, pv_fit, order, grid[:, 0], np.exp(grid[:, 1]),
+                         np.exp(grid[:, 2]) if second else None, y0)
+        candidate = grid[np.argmin(sse)]
+        if np.allclose(candidate, best):
+            scale *= 0.5
+            if scale < tol:
+                break
+        best = candidate
+
+    tau, t1 = best[0], np.exp(best[1])
+    t2 = np.exp(best[2]) if second else None
+    sse, gain, offset = _sse(t, pv, order, best[:1], np.array([t1]), None if t2 is None else np.array([t2]), y0)
+    sst = ((pv - pv.mean()) ** 2).sum()
+    if second and t2 > t1:
+        t1, t2 = t2, t1
+    return FitResult(order=order,
+                     k_ob=float(gain[0] / dx),
+                     tau_ob=float(tau),
+                     t1_ob=float(t1),
+                     t2_ob=None if t2 is None else float(t2),
+                     y0=float(offset[0]),
+                     rmse=float(np.sqrt(sse[0] / len(pv))),
+                     r2=float(1 - sse[0] / sst) if sst > 0 else 1.0)
+
+
+def guess_model(t, mv, pv):
+    """
+    Heuristic starting point used by the PID Tuner page: MV step where ΔMV >= 0.5 of the MV range,
+    dead time until ΔPV >= 0.1 of the PV range, time constant until PV reaches 63.2% of its maximum.
+    Returns (dx, t_step, tau_ob, t1_ob); raises IndexError if no step is found.
+    """
+    t = np.asarray(t, dtype=float)
+    mv = np.asarray(mv, dtype=float)
+    pv = np.asarray(pv, dtype=float)
+    dx = np.nanmax(mv) - np.nanmin(mv)
+    mv_start = np.flatnonzero(np.diff(mv) >= 0.5 * dx)[0] + 1
+    pv_start = np.flatnonzero(np.diff(pv) >= 0.1 * (np.nanmax(pv) - np.nanmin(pv)))[0] + 1
+    crossing = np.flatnonzero(pv >= 0.632 * np.nanmax(pv))[0]
+    return float(dx), float(t[mv_start]), float(t[pv_start] - t[mv_start]), float(t[crossing] - t[pv_start])
+
+
+def _moving_average(values, window):
+    """
+    Centered moving average of `window` samples, zero outside the array.
+    """
+    padded = np.concatenate((np.zeros(window // 2 + 1), values, np.zeros(window - 1 - window // 2)))
+    total = np.cumsum(padded)
+    return (total[window:] - total[:-window]) / window
+
+
+def estimate_dead_time(mv, pv, dt=1.0, max_lag=None):
+    """
+    Dead time from the cross-correlation of ΔMV and ΔPV, computed for every lag at once by FFT in O(n log n).
+    The correlation is the impulse response estimate, smoothed until its peak stands TARGET_SNR noise
+    deviations out; the tangent at the peak (steepest PV rise) crosses the baseline at the dead time,
+    which is exact for a 1st order model and the apparent dead time otherwise.
+    Confidence (0..1) compares the peak with the correlation noise expected from white PV noise.
+    Returns (tau_ob [s], confidence).
+    """
+    du = np.nan_to_num(np.diff(np.asarray(mv, dtype=float)))
+    dy = np.nan_to_num(np.diff(np.asarray(pv, dtype=float)))
+    n = len(du)
+    max_lag = n // 2 if max_lag is None else min(int(max_lag), n - 1)
+    if n < 2 or not du.any():
+        return 0.0, 0.0
+    size = 1 << int(2 * n - 1).bit_length()
+    response = np.fft.irfft(np.conj(np.fft.rfft(du, size)) * np.fft.rfft(dy, size), size)[:max_lag + 1]
+    step = np.cumsum(response)
+    # white PV noise of deviation sigma: second differences have 6 sigma^2 variance, where slow responses vanish;
+    # a moving average of `window` PV differences has 2 sigma^2 / window^2, times |ΔMV|^2 in the correlation
+    noise = 1.4826 * np.median(np.abs(np.diff(dy) - np.median(np.diff(dy)))) / np.sqrt(3) * np.sqrt(du @ du)
+
+    window = 1
+    while True:
+        smooth = _moving_average(response, window)
+        peak = int(np.argmax(np.abs(smooth)))
+        snr = abs(smooth[peak]) * window / noise if noise > 0 else np.inf
+        if snr >= TARGET_SNR or 2 * window > max(1, max_lag // 8):
+            break
+        window *= 2
+    if smooth[peak] == 0:
+        return 0.0, 0.0
+    tau = max(0.0, peak - step[peak] / smooth[peak]) * dt
+    return float(tau), float(np.clip(1 - MIN_SNR / snr, 0.0, 1.0))
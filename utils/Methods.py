@@ -0,0 +1,113 @@
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Callable
+
+import numpy as np
+
+from .Batch_Tuning import (COON, KOPELOVICH, KOPELOVICH_SHARKOV, _amigo, _aperiodic_stability, _huang, _lambda,
+                           _max_stability, _optimal_modulus, _skogestads, _ziegler_nichols, table_formula)
+
+FIRST_ORDER = "1st Order"
+SECOND_ORDER = "2nd Order T1 != T2"
+
+
+@dataclass(frozen=True, eq=False)
+class TuningMethod:
+    """
+    One tuning rule: the models and PID types it applies to, how to compute it and where it is valid.
+    """
+    name: str
+    orders: dict  # model order: PID types the rule gives settings for (0 - PI, 1 - PID)
+    scalar: str  # PID_Object method computing the settings of one model
+    formula: Callable | None = None  # vectorized (order, k, tau, t1, t2, pid, **settings) -> (P, I, D), None - none
+    options: dict = field(default_factory=dict)  # setting: values it takes, one variant per combination
+    table: dict | None = None  # coefficient table read by `formula`
+    valid: Callable | None = None  # (k, tau, t1, t2, pid, lamb) -> True inside the validity range
+    validity: str = ""  # the validity range in words
+
+    @property
+    def variants(self):
+        return [dict(zip(self.options, values)) for values in product(*self.options.values())]
+
+    def is_valid(self, k_ob, tau_ob, t1_ob, t2_ob=None, pid=0, lamb=3.0):
+        if self.valid is None:
+            return True
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.valid(k_ob, tau_ob, t1_ob, t2_ob, pid, lamb)
+
+
+TUNING_METHODS = {method.name: method for method in [
+    TuningMethod("Optimal Modulus method", {FIRST_ORDER: (0, 1), SECOND_ORDER: (0, 1)}, "optimal_module_method",
+                 _optimal_modulus),
+    TuningMethod("Aperiodic Stability Method", {FIRST_ORDER: (0, 1)}, "aperiodic_stability_method",
+                 _aperiodic_stability),
+    TuningMethod("Coon Method", {FIRST_ORDER: (0, 1)}, "table_method",
+                 table_formula(COON, ("overshoot", "disturbance"), per_gain=False),
+                 options={"overshoot": (0, 1), "disturbance": (0, 1)}, table=COON),
+    TuningMethod("Kopelovich Method", {FIRST_ORDER: (0, 1)}, "table_method",
+                 table_formula(KOPELOVICH, ("overshoot",), per_gain=True),
+                 options={"overshoot": (0, 1, 2)}, table=KOPELOVICH),
+    TuningMethod("Kopelovich-Sharkov Method", {FIRST_ORDER: (0, 1)}, "table_method",
+                 table_formula(KOPELOVICH_SHARKOV, ("overshoot",), per_gain=True),
+                 options={"overshoot": (0, 1, 2)}, table=KOPELOVICH_SHARKOV),
+    TuningMethod("Huang Method", {SECOND_ORDER: (0, 1)}, "huang_method", _huang,
+                 valid=lambda k, tau, t1, t2, pid, lamb: (tau / np.maximum(t1, t2) >= 0.1) &
+                 (tau / np.maximum(t1, t2) <= 10),
+                 validity="0.1 ≤ τ / T1 ≤ 10 (T1 the larger time constant)"),
+    TuningMethod("Skogestads Method", {FIRST_ORDER: (0,), SECOND_ORDER: (1,)}, "skogestads_method", _skogestads,
+                 valid=lambda k, tau, t1, t2, pid, lamb: np.minimum(t1, 4 * tau) > 0.01,
+                 validity="min(T1, 4τ) > 0.01 s"),
+    TuningMethod("Lambda Method", {FIRST_ORDER: (0, 1)}, "lambda_method", _lambda,
+                 valid=lambda k, tau, t1, t2, pid, lamb: (lamb >= 1) & (lamb <= 3),
+                 validity="1 ≤ λ ≤ 3"),
+    TuningMethod("AMIGO Method", {FIRST_ORDER: (0, 1)}, "amigo_method", _amigo),
+    TuningMethod("Ziegler-Nichols Method", {FIRST_ORDER: (0, 1)}, "ziegler_nichols", _ziegler_nichols,
+                 valid=lambda k, tau, t1, t2, pid, lamb: (tau / t1 >= 1) | (pid == 1),
+                 validity="τ / T ≥ 1 for PI"),
+    TuningMethod("Max Stability Method", {FIRST_ORDER: (0, 1)}, "max_stability_method", _max_stability),
+    TuningMethod("Optimized", {FIRST_ORDER: (0, 1), SECOND_ORDER: (0, 1)}, "optimized_method"),
+]}  # in menu order
+
+
+def _menus(methods):
+    menus = {}
+    for method in methods:
+        for order, pids in method.orders.items():
+            for pid in pids:
+                menus.setdefault((order, pid), []).append(method.name)
+    return menus
+
+
+METHODS = _menus(TUNING_METHODS.values())  # available methods for (model order, pid type: 0 - PI, 1 - PID)
+METHOD_VARIANTS = {method.name: method.variants for method in TUNING_METHODS.values() if method.options}
+BATCH_METHODS = {method.name: method.formula for method in TUNING_METHODS.values() if method.formula is not None}
+
+
+def calculate_pid_batch(method, order, k_ob, tau_ob, t1_ob, t2_ob=None, pid=0, overshoot=0, disturbance=0, lamb=3.0):
+    """
+    Element-wise PID_Object.calculate_pid over arrays of process models.
+    Model parameters (and `lamb`) broadcast against each other; `pid` is a scalar, `overshoot` and `disturbance`
+    may be arrays for coefficient-table methods. Returns arrays (P, I, D) of the standard form, D is all NaN for PI.
+    Models outside a method's validity range and formula singularities give NaN.
+    """
+    tuning = TUNING_METHODS[method]
+    k_ob, tau_ob, t1_ob, lamb = (np.asarray(value, dtype=float) for value in (k_ob, tau_ob, t1_ob, lamb))
+    t2_ob = None if t2_ob is None else np.asarray(t2_ob, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        p, i, d = tuning.formula(order, k_ob, tau_ob, t1_ob, t2_ob, pid, overshoot=overshoot, disturbance=disturbance,
+                                 lamb=lamb)
+        shape = np.broadcast_shapes(np.shape(p), np.shape(i))
+        p, i = np.broadcast_to(p, shape), np.broadcast_to(i, shape)
+        d = np.full(shape, np.nan) if d is None or pid == 0 else np.broadcast_to(d, shape)
+        valid = tuning.is_valid(k_ob, tau_ob, t1_ob, t2_ob, pid, lamb)
+    return tuple(np.where(np.isfinite(value) & valid, value, np.nan) for value in (p, i, d))
+
+
+def calculate_methods_batch(order, k_ob, tau_ob, t1_ob, t2_ob=None, pid=0, overshoot=0, disturbance=0, lamb=3.0,
+                            methods=None):
+    """
+    calculate_pid_batch for several methods at once (every method with a vectorized formula by default):
+    {method: (P, I, D)}.
+    """
+    return {method: calculate_pid_batch(method, order, k_ob, tau_ob, t1_ob, t2_ob, pid, overshoot, disturbance, lamb)
+            for method in (methods or BATCH_METHODS)}
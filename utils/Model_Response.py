@@ -0,0 +1,35 @@
+import numpy as np
+
+ORDERS = ("1st Order", "2nd Order T1 != T2", "2nd Order T1 = T2")
+
+
+def step_input(t, dx, t0=0):
+    """
+    Step of height `dx` applied at `t0` over the time grid `t` [s].
+    """
+    t = np.asarray(t, dtype=float)
+    return np.where(t >= t0, float(dx), 0.0)
+
+
+def step_response(t, order, k_ob, tau_ob, t1_ob, t2_ob=None, dx=1.0, y0=0.0):
+    """
+    Process model response to a step `dx` applied at t = 0, evaluated over the whole time grid `t` [s] at once.
+    Output stays at `y0` until the dead time `tau_ob` has passed.
+    Model parameters may be arrays broadcasting against `t` (e.g. shape (m, 1)) to evaluate m models in one call.
+    """
+    t = np.asarray(t, dtype=float)
+    active = t >= tau_ob
+    s = np.where(active, t - tau_ob, 0.0)  # time since the end of dead time, 0 before it
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        if order == "1st Order":
+            h = 1 - np.exp(-s / t1_ob)
+        elif order == "2nd Order T1 != T2":
+            t_max, t_min = np.maximum(t1_ob, t2_ob), np.minimum(t1_ob, t2_ob)
+            h = 1 - t_max / (t_max - t_min) * np.exp(-s / t_max) + t_min / (t_max - t_min) * np.exp(-s / t_min)
+        elif order == "2nd Order T1 = T2":
+            h = 1 - np.exp(-s / t1_ob) * (1 + s / t1_ob)
+        else:
+            raise ValueError(f"Unknown model order: {order}")
+
+    return y0 + np.where(active, k_ob * h * dx, 0.0)
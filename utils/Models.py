@@ -0,0 +1,132 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from .Methods import BATCH_METHODS, calculate_pid_batch
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessModel:
+    """
+    Immutable process model K e^(-tau s) / ((T1 s + 1)(T2 s + 1)); hashable, safe to share between threads.
+    T2 is always None for a 1st order model.
+    """
+    order: str
+    k_ob: float
+    tau_ob: float
+    t1_ob: float
+    t2_ob: float | None = None
+
+    def __post_init__(self):
+        if self.order == "1st Order":
+            object.__setattr__(self, "t2_ob", None)
+
+
+@dataclass(frozen=True, slots=True)
+class TuningResult:
+    """
+    Standard form settings of one tuning; D is None for PI. Unpacks as (P, I, D).
+    """
+    p_pid: float | None
+    i_pid: float | None
+    d_pid: float | None = None
+
+    def __iter__(self):
+        return iter((self.p_pid, self.i_pid, self.d_pid))
+
+
+class ModelArray:
+    """
+    Column store of many process models of one order: float arrays k_ob, tau_ob, t1_ob and t2_ob
+    (None for 1st order). Pickles as four raw buffers, so slices ship cheaply to worker processes.
+    """
+    __slots__ = ("order", "k_ob", "tau_ob", "t1_ob", "t2_ob")
+
+    def __init__(self, order, k_ob, tau_ob, t1_ob, t2_ob=None):
+        self.order = order
+        self.k_ob, self.tau_ob, self.t1_ob = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (k_ob, tau_ob, t1_ob)))
+        self.t2_ob = None if order == "1st Order" or t2_ob is None else \
+            np.broadcast_to(np.asarray(t2_ob, dtype=float), self.k_ob.shape)
+
+    @classmethod
+    def from_models(cls, models):
+        """
+        ModelArray of ProcessModel instances, which must all have the same order.
+        """
+        models = list(models)
+        orders = {model.order for model in models}
+        if len(orders) != 1:
+            raise ValueError(f"Models must share one order, got {sorted(orders)}")
+        order = orders.pop()
+        t2_ob = None if order == "1st Order" else [model.t2_ob for model in models]
+        return cls(order, [model.k_ob for model in models], [model.tau_ob for model in models],
+                   [model.t1_ob for model in models], t2_ob)
+
+    def __reduce__(self):
+        return ModelArray, (self.order, self.k_ob, self.tau_ob, self.t1_ob, self.t2_ob)
+
+    def __len__(self):
+        return len(self.k_ob)
+
+    def __getitem__(self, index):
+        if np.ndim(index) == 0 and not isinstance(index, slice):
+            return ProcessModel(self.order, float(self.k_ob[index]), float(self.tau_ob[index]),
+                                float(self.t1_ob[index]), None if self.t2_ob is None else float(self.t2_ob[index]))
+        return ModelArray(self.order, self.k_ob[index], self.tau_ob[index], self.t1_ob[index],
+                          None if self.t2_ob is None else self.t2_ob[index])
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    @property
+    def nbytes(self):
+        return sum(value.nbytes for value in (self.k_ob, self.tau_ob, self.t1_ob, self.t2_ob) if value is not None)
+
+    def columns(self):
+        """
+        (k_ob, tau_ob, t1_ob, t2_ob) as taken by calculate_pid_batch and simulate_batch.
+        """
+        return self.k_ob, self.tau_ob, self.t1_ob, self.t2_ob
+
+    def split(self, parts):
+        """
+        At most `parts` contiguous chunks, e.g. one per worker process.
+        """
+        return [self[chunk] for chunk in np.array_split(np.arange(len(self)), max(1, min(parts, len(self))))]
+
+    def tune(self, method, pid=0, overshoot=0, disturbance=0, lamb=3.0, criterion="IAE", workers=1):
+        """
+        Arrays (P, I, D) of `method` for every model, NaN where undefined (see calculate_pid_batch).
+        Methods without a vectorized form (Optimized) are tuned model by model, split across `workers`
+        processes (None - all cores).
+        """
+        if method in BATCH_METHODS:
+            return calculate_pid_batch(method, self.order, *self.columns(), pid, overshoot, disturbance, lamb)
+        args = (method, pid, overshoot, disturbance, lamb, criterion)
+        workers = workers or os.cpu_count() or 1
+        chunks = [(chunk, args) for chunk in self.split(workers)]
+        if workers == 1:
+            results = list(map(_tune_chunk, chunks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_tune_chunk, chunks))
+        return tuple(np.concatenate(values) for values in zip(*results))
+
+
+def _tune_chunk(job):
+    from .PID_Classes import TuningRequest, tune  # PID_Classes builds on this module
+
+    models, (method, pid, overshoot, disturbance, lamb, criterion) = job
+    settings = np.full((len(models), 3), np.nan)
+    for row, model in enumerate(models):
+        try:
+            result = tune(TuningRequest.from_model(model, pid, method, overshoot, disturbance, lamb, criterion))
+        except ArithmeticError:
+            continue
+        settings[row] = [np.nan if value is None else value for value in result]
+    if pid == 0:
+        settings[:, 2] = np.nan
+    return settings.T
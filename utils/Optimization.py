@@ -0,0 +1,91 @@
+import numpy as np
+
+from .Cache import LRUCache
+from .Frequency import max_sensitivity
+from .Methods import BATCH_METHODS, METHOD_VARIANTS, METHODS, calculate_pid_batch
+from .Simulation import parallel_gains, simulate_batch, time_grid
+
+CRITERIA = {"IAE": "iae", "ITAE": "itae"}  # page label: SimulationResult field of the setpoint response
+MS_LIMIT = 1.4  # robustness constraint on the maximum sensitivity
+DETUNE = 0.5 ** np.arange(12)  # gain factors tried on every rule-based seed to find a start within MS_LIMIT
+INITIAL_STEP = 0.25  # first pattern search step, in natural log of the gains
+MIN_STEP = 0.005
+MAX_ITERATIONS = 60
+
+optimization_cache = LRUCache(max_entries=256)
+
+
+def _cost(model, kp, ki, kd, criterion, ms_limit, dt, horizon):
+    """
+    Closed-loop index of every candidate at once; inf where the loop is unstable or Ms > ms_limit.
+    """
+    result = simulate_batch(*model, kp, ki, kd, dt=dt, horizon=horizon, record=False)
+    ms = max_sensitivity(*model, kp, ki, kd)
+    return np.where(result.stable & (ms <= ms_limit), getattr(result, CRITERIA[criterion]), np.inf)
+
+
+def _seeds(order, k_ob, tau_ob, t1_ob, t2_ob, pid):
+    """
+    Parallel gains (kp, ki, kd) of every rule-based method and variant that gives a positive P and I.
+    """
+    seeds = []
+    for method in METHODS.get((order, pid), []):
+        if method not in BATCH_METHODS:
+            continue
+        for variant in METHOD_VARIANTS.get(method, [{}]):
+            p, i, d = calculate_pid_batch(method, order, k_ob, tau_ob, t1_ob, t2_ob, pid, **variant)
+            seeds.append(parallel_gains(p, i, d if pid == 1 else None))
+    seeds = np.array(seeds, dtype=float).reshape(-1, 3)
+    valid = np.isfinite(seeds).all(axis=1) & (seeds[:, 0] > 0) & (seeds[:, 1] > 0) & (seeds[:, 2] >= 0)
+    return seeds[valid]
+
+
+def optimize_pid(order, k_ob, tau_ob, t1_ob, t2_ob=None, pid=0, criterion="IAE", ms_limit=MS_LIMIT):
+    """
+    Standard form (P, I, D) minimizing `criterion` (a key of CRITERIA) of the setpoint response of the model,
+    subject to Ms <= ms_limit. Rule-based settings are detuned until they meet the constraint, the best one
+    starts a pattern search over log gains that evaluates all neighbours in one vectorized simulation.
+    Results are memoized in optimization_cache. D is None for PI; raises ArithmeticError if no start is found.
+    """
+    t2_ob = t2_ob if order != "1st Order" else None
+    key = (order, float(k_ob), float(tau_ob), float(t1_ob), None if t2_ob is None else float(t2_ob), pid, criterion,
+           float(ms_limit))
+    return optimization_cache.get_or_compute(key, lambda: _optimize(order, k_ob, tau_ob, t1_ob, t2_ob, pid,
+                                                                     criterion, ms_limit))
+
+
+def _optimize(order, k_ob, tau_ob, t1_ob, t2_ob, pid, criterion, ms_limit):
+    sign = -1.0 if k_ob < 0 else 1.0  # reverse acting loops are tuned on |K|, P takes the sign back
+    model = (abs(k_ob), tau_ob, t1_ob, t2_ob)
+    dt, horizon = time_grid(tau_ob, t1_ob, t2_ob)
+
+    seeds = _seeds(order, *model, pid)
+    if pid == 1 and not len(seeds):
+        seeds = _seeds(order, *model, 0)
+    if not len(seeds):
+        raise ArithmeticError("No rule-based settings to start the optimization from")
+    starts = (seeds[:, None, :] * DETUNE[None, :, None]).reshape(-1, 3)
+    costs = _cost(model, *starts.T, criterion, ms_limit, dt, horizon)
+    if not np.isfinite(costs).any():
+        raise ArithmeticError(f"No settings with Ms <= {ms_limit} found")
+    with np.errstate(divide="ignore"):  # kd = 0 of a PI start is log(0) = -inf, dropped below
+        best, cost = np.log(starts[np.argmin(costs)]), np.min(costs)
+
+    dimensions = 3 if pid == 1 and np.isfinite(best[2]) else 2
+    directions = np.stack(np.meshgrid(*[[-1, 0, 1]] * dimensions, indexing="ij"), axis=-1).reshape(-1, dimensions)
+    directions = directions[np.any(directions != 0, axis=1)]
+    step = INITIAL_STEP
+    for _ in range(MAX_ITERATIONS):
+        if step < MIN_STEP:
+            break
+        candidates = np.repeat(best[None, :], len(directions), axis=0)
+        candidates[:, :dimensions] += step * directions
+        gains = np.exp(candidates)
+        costs = _cost(model, *gains.T, criterion, ms_limit, dt, horizon)
+        if np.min(costs) < cost:
+            best, cost = candidates[np.argmin(costs)], np.min(costs)
+        else:
+            step /= 2
+
+    kp, ki, kd = np.exp(best)
+    return float(sign * kp), float(kp / ki), float(kd / kp) if pid == 1 else None
@@ -1,7 +1,65 @@
+from dataclasses import dataclass
 from math import exp
 
+import numpy as np
+
+from .Cache import LRUCache
+from .Methods import METHOD_VARIANTS, METHODS, TUNING_METHODS
+from .Models import ProcessModel, TuningResult
+
+TUNING_CACHE_ENTRIES = 4096
+
+
+@dataclass(frozen=True)
+class TuningRequest:
+    """
+    Everything the settings of a tuning method depend on; hashable, so it keys tuning_cache.
+    """
+    order: str
+    k_ob: float
+    tau_ob: float
+    t1_ob: float
+    t2_ob: float | None = None
+    pid: int | None = None  # 0 - PI, 1 - PID
+    method: str | None = None
+    overshoot: int | None = None
+    disturbance: int | None = None
+    lamb: float = 3.0
+    criterion: str = "IAE"
+
+    @classmethod
+    def from_object(cls, obj):
+        return cls(obj.order, float(obj.k_ob), float(obj.tau_ob), float(obj.t1_ob),
+                   None if obj.t2_ob is None else float(obj.t2_ob), obj.pid, obj.method, obj.overshoot,
+                   obj.disturbance, float(obj.lamb), obj.criterion)
+
+    @classmethod
+    def from_model(cls, model, pid=None, method=None, overshoot=None, disturbance=None, lamb=3.0, criterion="IAE"):
+        return cls(model.order, float(model.k_ob), float(model.tau_ob), float(model.t1_ob),
+                   None if model.t2_ob is None else float(model.t2_ob), pid, method, overshoot, disturbance,
+                   float(lamb), criterion)
+
+    @property
+    def model(self):
+        return ProcessModel(self.order, self.k_ob, self.tau_ob, self.t1_ob, self.t2_ob)
+
+
+tuning_cache = LRUCache(max_entries=TUNING_CACHE_ENTRIES)  # TuningRequest: (P, I, D), shared by all callers
+
+
+def tune(request):
+    """
+    Standard form TuningResult (unpacks as P, I, D) for a TuningRequest, memoized in tuning_cache.
+    Errors of the method formulas (ArithmeticError) are raised and not cached.
+    """
+    return tuning_cache.get_or_compute(request, lambda: PID_Object.from_request(request).settings())
+
 
 class PID_Object:
+    """
+    Mutable front end kept for the pages and existing callers. Tuning runs on a private copy
+    (see tune), so the model given here is never changed; `model` and `result` are immutable snapshots.
+    """
     def __init__(self, order, k_ob, tau_ob, t1_ob, t2_ob=None):
         self.order = order
         self.k_ob = k_ob
@@ -17,35 +75,49 @@ class PID_Object:
         self.disturbance = None
         self.pid = None
         self.lamb = 3.0
+        self.criterion = "IAE"  # minimized by the Optimized method
 
         self.method = None
 
+    @classmethod
+    def from_model(cls, model, result=None):
+        obj = cls(model.order, model.k_ob, model.tau_ob, model.t1_ob, model.t2_ob)
+        if result is not None:
+            obj.p_pid, obj.i_pid, obj.d_pid = result
+        return obj
+
+    @property
+    def model(self):
+        return ProcessModel(self.order, self.k_ob, self.tau_ob, self.t1_ob, self.t2_ob)
+
+    @property
+    def result(self):
+        return TuningResult(self.p_pid, self.i_pid, self.d_pid if self.pid == 1 else None)
+
+    @classmethod
+    def from_request(cls, request):
+        obj = cls(request.order, request.k_ob, request.tau_ob, request.t1_ob, request.t2_ob)
+        obj.pid, obj.method, obj.overshoot, obj.disturbance = (request.pid, request.method, request.overshoot,
+                                                                request.disturbance)
+        obj.lamb, obj.criterion = request.lamb, request.criterion
+        return obj
+
+    def settings(self):
+        """
+        Run the method formulas on this object and return its TuningResult.
+        """
+        self.run_method()
+        return self.result
+
     def calculate_pid(self):
-        match self.method:
-            case "Optimal Modulus method":
-                self.optimal_module_method()
-            case "Aperiodic Stability Method":
-                self.aperiodic_stability_method()
-            case "Coon Method":
-                self.coon_method()
-            case "Kopelovich Method":
-                self.kopelovich_method()
-            case "Kopelovich-Sharkov Method":
-                self.kopelovich_sharkov_method()
-            case "Skogestads Method":
-                self.skogestads_method()
-            case "Lambda Method":
-                self.lambda_method()
-            case "AMIGO Method":
-                self.amigo_method()
-            case "Ziegler-Nichols Method":
-                self.ziegler_nichols()
-            case "Max Stability Method":
-                self.max_stability_method()
-            case "Huang Method":
-                self.huang_method()
-            case _:
-                pass
+        """
+        Set p_pid, i_pid, d_pid with the chosen method; repeated requests come from tuning_cache.
+        """
+        self.p_pid, self.i_pid, self.d_pid = tune(TuningRequest.from_object(self))
+
+    def run_method(self):
+        if self.method in TUNING_METHODS:
+            getattr(self, TUNING_METHODS[self.method].scalar)()
 
     def __str__(self):
         if self.t2_ob is None:
@@ -133,121 +205,43 @@ P = {round(self.p_pid, 4)} \nI = {round(self.i_pid, 4)} \nD = {round(self.d_pid,
             self.i_pid = i * self.tau_ob
             self.d_pid = d * self.tau_ob
 
-    def coon_method(self):
-        if self.pid == 0:
-            if self.overshoot == 0:
-                if self.disturbance == 0:
-                    self.p_pid = 0.35 * self.t1_ob / self.tau_ob
-                    self.i_pid = 1.2 * self.tau_ob
-                elif self.disturbance == 1:
-                    self.p_pid = 0.6 * self.t1_ob / self.tau_ob
-                    self.i_pid = 4 * self.tau_ob
-            elif self.overshoot == 1:
-                if self.disturbance == 0:
-                    self.p_pid = 0.6 * self.t1_ob / self.tau_ob
-                    self.i_pid = self.tau_ob
-                elif self.disturbance == 1:
-                    self.p_pid = 0.7 * self.t1_ob / self.tau_ob
-                    self.i_pid = 2.3 * self.tau_ob
-        elif self.pid == 1:
-            if self.overshoot == 0:
-                if self.disturbance == 0:
-                    self.p_pid = 0.6 * self.t1_ob / self.tau_ob
-                    self.i_pid = self.tau_ob
-                    self.d_pid = 0.5 * self.tau_ob
-                elif self.disturbance == 1:
-                    self.p_pid = 0.95 * self.t1_ob / self.tau_ob
-                    self.i_pid = 2.4 * self.tau_ob
-                    self.d_pid = 0.42 * self.tau_ob
-            elif self.overshoot == 1:
-                if self.disturbance == 0:
-                    self.p_pid = 0.95 * self.t1_ob / self.tau_ob
-                    self.i_pid = 1.35 * self.tau_ob
-                    self.d_pid = 0.47 * self.tau_ob
-                elif self.disturbance == 1:
-                    self.p_pid = 1.2 * self.t1_ob / self.tau_ob
-                    self.i_pid = 2 * self.tau_ob
-                    self.d_pid = 0.42 * self.tau_ob
-
-    def kopelovich_method(self):
-        if self.pid == 0:
-            if self.overshoot == 0:
-                self.p_pid = 0.6 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = 0.6 * self.t1_ob
-            elif self.overshoot == 1:
-                self.p_pid = 0.7 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = 0.7 * self.t1_ob
-            elif self.overshoot == 2:
-                self.p_pid = 1.0 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = self.t1_ob
-        elif self.pid == 1:
-            if self.overshoot == 0:
-                self.p_pid = 0.95 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = 2.4 * self.tau_ob
-                self.d_pid = 0.4 * self.tau_ob
-            elif self.overshoot == 1:
-                self.p_pid = 1.2 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = 2.0 * self.tau_ob
-                self.d_pid = 0.4 * self.tau_ob
-            elif self.overshoot == 2:
-                self.p_pid = 1.4 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = 1.3 * self.tau_ob
-                self.d_pid = 0.5 * self.tau_ob
-
-    def kopelovich_sharkov_method(self):
-        if self.pid == 0:
-            if self.overshoot == 0:
-                self.p_pid = 0.6 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = 0.8 * self.tau_ob + 0.5 * self.t1_ob
-            elif self.overshoot == 1:
-                self.p_pid = 0.7 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = self.tau_ob + 0.3 * self.t1_ob
-            elif self.overshoot == 2:
-                self.p_pid = 1.0 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = self.tau_ob + 0.35 * self.t1_ob
-        elif self.pid == 1:
-            if self.overshoot == 0:
-                self.p_pid = 0.95 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = 2.4 * self.tau_ob
-                self.d_pid = 0.4 * self.tau_ob
-            elif self.overshoot == 1:
-                self.p_pid = 1.2 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = 2.0 * self.tau_ob
-                self.d_pid = 0.4 * self.tau_ob
-            elif self.overshoot == 2:
-                self.p_pid = 1.4 * self.t1_ob / (self.k_ob * self.tau_ob)
-                self.i_pid = 1.3 * self.tau_ob
-                self.d_pid = 0.5 * self.tau_ob
+    def table_method(self):
+        """
+        Methods given by a coefficient table (Coon, Kopelovich, Kopelovich-Sharkov), see TuningMethod.table.
+        Settings are left as they are until every option of the method (overshoot, disturbance) is chosen.
+        """
+        method = TUNING_METHODS[self.method]
+        options = {name: getattr(self, name) for name in method.options}
+        if None in options.values():
+            return
+        with np.errstate(all="raise"):  # division by zero raises an ArithmeticError as in the other methods
+            p, i, d = method.formula(self.order, self.k_ob, self.tau_ob, self.t1_ob, self.t2_ob, self.pid, **options)
+        if np.isfinite(p):
+            self.p_pid, self.i_pid = float(p), float(i)
+            self.d_pid = float(d) if self.pid == 1 else self.d_pid
 
     def huang_method(self):
-        if self.t2_ob > self.t1_ob:
-            self.t1_ob, self.t2_ob = self.t2_ob, self.t1_ob
-        if self.tau_ob / self.t1_ob < 0.1 or self.tau_ob / self.t1_ob > 10:
+        t1, t2 = max(self.t1_ob, self.t2_ob), min(self.t1_ob, self.t2_ob)  # formulas take T1 >= T2
+        k, tau = self.k_ob, self.tau_ob
+        if tau / t1 < 0.1 or tau / t1 > 10:
             self.p_pid, self.i_pid, self.d_pid = None, None, None
         if self.pid == 0:
-            self.p_pid = (1 / self.k_ob) * ((-13.054 - 9.0916 * self.tau_ob / self.t1_ob + 2.6647 * self.t2_ob /
-                                             self.t1_ob + 9.162 * self.tau_ob * self.t2_ob / self.t1_ob ** 2) +
-                                            (0.3053 * (self.tau_ob / self.t1_ob) ** (-1.0169) + 1.1075 *
-                                             (self.tau_ob / self.t1_ob) ** 3.5959 - 2.2927 * (self.tau_ob / self.t1_ob)
-                                             ** 3.6843) + (-31.0306 * (self.t2_ob / self.t1_ob) ** 0.8476 - 13.0155 *
-                                            (self.t2_ob / self.t1_ob) ** 2.6083 + 9.6899 * (self.t2_ob / self.t1_ob) **
-                                            2.9049) + (-0.6418 * (self.t2_ob / self.tau_ob) + 18.9643 * (self.t2_ob /
-                                            self.t1_ob) * (self.tau_ob / self.t1_ob) ** (-0.2016) - 39.7340 *
-                                            (self.t2_ob / self.t1_ob) * (self.tau_ob / self.t1_ob) ** 1.3293) +
-                                            (28.155 * (self.tau_ob / self.t1_ob) * (self.t2_ob / self.t1_ob) ** 0.801 -
-                                             2.0067 * (self.tau_ob / self.t1_ob) * (self.t2_ob / self.t1_ob) ** 3.956) +
-                                            (4.825 * exp(self.tau_ob / self.t1_ob) + 2.1137 * exp(self.t2_ob /
-                                            self.t1_ob) + 8.4511 * exp(self.tau_ob * self.t2_ob / self.t1_ob ** 2)))
-            self.i_pid = self.t1_ob * (0.9771 - 0.2492 * self.tau_ob / self.t1_ob + 0.8753 * self.t2_ob / self.t1_ob +
-                                       3.4651 * (self.tau_ob / self.t1_ob) ** 2 - 3.8516 * self.tau_ob * self.t2_ob /
-                                       self.t1_ob ** 2)
+            self.p_pid = (1 / k) * ((-13.054 - 9.0916 * tau / t1 + 2.6647 * t2 / t1 + 9.162 * tau * t2 / t1 ** 2) +
+                                    (0.3053 * (tau / t1) ** (-1.0169) + 1.1075 * (tau / t1) ** 3.5959 - 2.2927 *
+                                     (tau / t1) ** 3.6843) + (-31.0306 * (t2 / t1) ** 0.8476 - 13.0155 * (t2 / t1) **
+                                    2.6083 + 9.6899 * (t2 / t1) ** 2.9049) + (-0.6418 * (t2 / tau) + 18.9643 *
+                                    (t2 / t1) * (tau / t1) ** (-0.2016) - 39.7340 * (t2 / t1) * (tau / t1) ** 1.3293) +
+                                    (28.155 * (tau / t1) * (t2 / t1) ** 0.801 - 2.0067 * (tau / t1) * (t2 / t1) **
+                                     3.956) + (4.825 * exp(tau / t1) + 2.1137 * exp(t2 / t1) + 8.4511 *
+                                               exp(tau * t2 / t1 ** 2)))
+            self.i_pid = t1 * (0.9771 - 0.2492 * tau / t1 + 0.8753 * t2 / t1 + 3.4651 * (tau / t1) ** 2 - 3.8516 *
+                               tau * t2 / t1 ** 2)
         elif self.pid == 1:
-            self.p_pid = 0.589 / (self.k_ob * self.tau_ob) * (self.tau_ob / self.t2_ob) ** 0.003 * (0.0052 * self.t2_ob
-                                  ** 2 / self.tau_ob + 0.898 * self.t2_ob + 0.4877 * self.tau_ob + self.t1_ob)
-            self.i_pid = 0.0052 * self.t2_ob ** 2 / self.tau_ob + 0.898 * self.t2_ob + 0.4877 * self.tau_ob + self.t1_ob
-            self.d_pid = self.t1_ob * (0.0052 * self.t2_ob ** 2 / self.tau_ob + 0.898 * self.t2_ob + 0.4877 *
-                                       self.tau_ob) / (0.0052 * self.t2_ob ** 2 / self.tau_ob + 0.898 * self.t2_ob +
-                                                       0.4877 * self.tau_ob + self.t1_ob)
+            self.p_pid = 0.589 / (k * tau) * (tau / t2) ** 0.003 * (0.0052 * t2 ** 2 / tau + 0.898 * t2 + 0.4877 * tau +
+                                                                   t1)
+            self.i_pid = 0.0052 * t2 ** 2 / tau + 0.898 * t2 + 0.4877 * tau + t1
+            self.d_pid = t1 * (0.0052 * t2 ** 2 / tau + 0.898 * t2 + 0.4877 * tau) / (0.0052 * t2 ** 2 / tau + 0.898 *
+                                                                                   t2 + 0.4877 * tau + t1)
 
     def skogestads_method(self):
         minimum = min(self.t1_ob, 4 * self.tau_ob)
@@ -322,6 +316,13 @@ P = {round(self.p_pid, 4)} \nI = {round(self.i_pid, 4)} \nD = {round(self.d_pid,
             self.i_pid = self.p_pid / ki
             self.d_pid = kd / self.p_pid
 
+    def optimized_method(self):
+        from .Optimization import optimize_pid  # imported on use: it pulls in the simulation modules
+        p, i, d = optimize_pid(self.order, self.k_ob, self.tau_ob, self.t1_ob, self.t2_ob, self.pid, self.criterion)
+        self.p_pid, self.i_pid = p, i
+        if self.pid == 1:
+            self.d_pid = d
+
 
 if __name__ == "__main__":
     obj = PID_Object('first', 1, 2, 3)
@@ -338,12 +339,14 @@ if __name__ == "__main__":
     obj3.pid = 0
     obj3.overshoot = 0
     obj3.disturbance = 0
-    obj3.coon_method()
+    obj3.method = "Coon Method"
+    obj3.calculate_pid()
     print(obj3)
 
     obj4 = PID_Object('second', 1, 2, 3, 4)
     obj4.pid = 0
     obj4.overshoot = 0
     obj4.disturbance = 0
-    obj4.kopelovich_method()
+    obj4.method = "Kopelovich Method"
+    obj4.calculate_pid()
     print(obj4)
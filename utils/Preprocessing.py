@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .Data_Loader import with_stats
+
+FILTERS = ["None", "Median", "Savitzky-Golay", "Low-pass"]
+FILTER_WINDOW = 11  # samples
+SAVGOL_ORDER = 2  # polynomial order of the Savitzky-Golay filter
+OUTLIER_WINDOW = 11  # samples around each point used for its local median and spread
+OUTLIER_THRESHOLD = 3.0  # robust standard deviations from the local median before a point is clipped
+MEDIAN_BLOCK = 1_000_000  # rows per vectorized rolling median step
+
+
+def _odd(window):
+    window = max(1, int(window))
+    return window if window % 2 else window + 1
+
+
+def _fill_gaps(values):
+    """
+    NaN gaps bridged by linear interpolation (edges hold the nearest value), so the filters see a
+    continuous signal; returns the filled values and the NaN mask to restore afterwards.
+    """
+    missing = np.isnan(values)
+    if not missing.any() or missing.all():
+        return values, missing
+    positions = np.arange(len(values))
+    filled = values.copy()
+    filled[missing] = np.interp(positions[missing], positions[~missing], values[~missing])
+    return filled, missing
+
+
+def rolling_median(values, window=FILTER_WINDOW):
+    """
+    Centered median of `window` samples (made odd), with edge values repeated at both ends.
+    """
+    values = np.asarray(values, dtype=float)
+    window = _odd(window)
+    padded = np.pad(values, window // 2, mode="edge")
+    result = np.empty_like(values)
+    for begin in range(0, len(values), MEDIAN_BLOCK):
+        block = sliding_window_view(padded[begin:begin + MEDIAN_BLOCK + window - 1], window)
+        result[begin:begin + len(block)] = np.median(block, axis=1)
+    return result
+
+
+def savgol_coefficients(window=FILTER_WINDOW, order=SAVGOL_ORDER):
+    """
+    Savitzky-Golay smoothing weights: value at the center of the least-squares polynomial of `order`
+    through `window` (made odd) samples.
+    """
+    window = _odd(window)
+    offsets = np.arange(window) - window // 2
+    return np.linalg.pinv(np.vander(offsets, min(order, window - 1) + 1, increasing=True))[0]
+
+
+def savgol(values, window=FILTER_WINDOW, order=SAVGOL_ORDER):
+    """
+    Savitzky-Golay smoothing, which keeps peaks and slopes better than a moving average of the same width.
+    """
+    values = np.asarray(values, dtype=float)
+    coefficients = savgol_coefficients(window, order)
+    padded = np.pad(values, len(coefficients) // 2, mode="edge")
+    return np.convolve(padded, coefficients[::-1], mode="valid")
+
+
+def lowpass(values, period=FILTER_WINDOW):
+    """
+    Zero-phase Gaussian low-pass applied by FFT: components slower than `period` samples pass, faster
+    ones are attenuated (-3 dB at `period`). No phase lag, so steps are not shifted and the dead time
+    is not biased as with a causal filter.
+    """
+    values = np.asarray(values, dtype=float)
+    sigma = np.sqrt(np.log(2)) / (2 * np.pi) * max(float(period), 1.0)  # kernel deviation [samples]
+    pad = int(np.ceil(4 * sigma))
+    padded = np.pad(values, pad, mode="edge")
+    size = 1 << int(len(padded) - 1).bit_length()
+    frequencies = np.fft.rfftfreq(size)
+    spectrum = np.fft.rfft(padded, size) * np.exp(-2 * (np.pi * sigma * frequencies) ** 2)
+    return np.fft.irfft(spectrum, size)[pad:pad + len(values)]
+
+
+def clip_outliers(values, window=OUTLIER_WINDOW, threshold=OUTLIER_THRESHOLD):
+    """
+    Hampel-style clipping: points further than `threshold` robust deviations (1.4826 x rolling MAD)
+    from the rolling median of `window` samples are clipped to that band; NaN gaps are kept.
+    """
+    values, missing = _fill_gaps(np.asarray(values, dtype=float))
+    median = rolling_median(values, window)
+    spread = threshold * 1.4826 * rolling_median(np.abs(values - median), window)
+    result = np.clip(values, median - spread, median + spread)
+    result[missing] = np.nan
+    return result
+
+
+def filter_values(values, method, window=FILTER_WINDOW):
+    """
+    Apply one of FILTERS to a 1-D array; NaN gaps are bridged for filtering and kept as NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    if method in (None, "None"):
+        return values
+    values, missing = _fill_gaps(values)
+    if missing.all():
+        return values
+    match method:
+        case "Median":
+            result = rolling_median(values, window)
+        case "Savitzky-Golay":
+            result = savgol(values, window)
+        case "Low-pass":
+            result = lowpass(values, window)
+        case _:
+            raise ValueError(f"Unknown filter: {method}")
+    result[missing] = np.nan
+    return result
+
+
+def resample_uniform(frame, interval, hold=()):
+    """
+    Frame on a uniform grid of `interval` seconds from its first to last timestamp. Rows are sorted and
+    duplicate timestamps dropped first. Columns are linearly interpolated, which also undoes historian
+    compression, except the `hold` columns (e.g. MV) that keep their previous value so steps stay steps.
+    """
+    times = np.asarray(frame.index, dtype="datetime64[ns]").view(np.int64)
+    order = np.argsort(times, kind="stable")
+    times, first = np.unique(times[order], return_index=True)
+    order = order[first]
+    grid = np.arange(times[0], times[-1] + 1, int(round(interval * 1e9)), dtype=np.int64)
+    columns = {}
+    for column in frame.columns:
+        values = frame[column].to_numpy(dtype=float)[order]
+        valid = ~np.isnan(values)
+        if not valid.any():
+            columns[column] = np.full(len(grid), np.nan)
+        elif column in hold:
+            positions = np.searchsorted(times[valid], grid, side="right") - 1
+            columns[column] = values[valid][np.maximum(positions, 0)]
+        else:
+            columns[column] = np.interp(grid, times[valid], values[valid])
+    return pd.DataFrame(columns, index=pd.DatetimeIndex(grid.view("datetime64[ns]"), name=frame.index.name))
+
+
+def preprocess(frame, mv, pv, interval=None, method=None, window=FILTER_WINDOW, clip=None):
+    """
+    MV and PV columns of `frame` prepared for model fitting:
+    resampled to `interval` seconds (None keeps the samples), outliers clipped at `clip` robust deviations
+    (None - off) in both columns, PV filtered with `method` of FILTERS. MV is not filtered so its steps stay sharp.
+    Returns a new frame with statistics attached (see with_stats).
+    """
+    frame = frame[list(dict.fromkeys([mv, pv]))]
+    if interval:
+        frame = resample_uniform(frame, interval, hold=[mv])
+    columns = {column: frame[column].to_numpy(dtype=float) for column in frame.columns}
+    if clip:
+        columns = {column: clip_outliers(values, threshold=clip) for column, values in columns.items()}
+    columns[pv] = filter_values(columns[pv], method, window)
+    return with_stats(pd.DataFrame(columns, index=frame.index))
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from .Data_Loader import CHUNK_ROWS, iter_chunks
+from .PID_Classes import PID_Object
+
+FORGETTING = 0.999  # memory of about 1 / (1 - FORGETTING) samples
+MAX_DELAY = 60  # dead time candidates 0..MAX_DELAY samples, one estimator each
+UPDATE_BLOCK = 4_096  # samples added per vectorized step
+RIDGE = 1e-9  # relative regularization of the normal equations while the process is not excited
+REPORT_EVERY = 100  # samples between estimates yielded by track_file
+
+
+class RecursiveEstimator:
+    """
+    Recursive least squares with forgetting for the ARX form of a 1st order plus dead time model
+    y[n] = a y[n-1] + b u[n-1-d] + c, run for every dead time d of a delay bank at once.
+    The exponentially weighted normal equations are updated in information form, so adding a sample costs
+    O(bank size) whatever came before, and the estimate equals the covariance-form RLS one.
+    The bank member with the smallest weighted residual gives K = b / (1 - a), T = -dt / ln(a), tau = d dt.
+    """
+    def __init__(self, dt, max_delay=MAX_DELAY, forgetting=FORGETTING):
+        self.dt = dt
+        self.forgetting = forgetting
+        self.delays = np.arange(max_delay + 1)
+        self.moments = np.zeros((len(self.delays), 3, 3))  # sum of weighted regressor outer products
+        self.cross = np.zeros((len(self.delays), 3))  # sum of weighted regressor * PV
+        self.energy = np.zeros(len(self.delays))  # sum of weighted PV^2
+        self.mv_history = np.full(max_delay + 1, np.nan)  # latest MV samples, oldest first
+        self.pv = np.nan
+        self.count = 0
+
+    def update(self, mv, pv):
+        """
+        Add one (MV, PV) sample.
+        """
+        self.update_many([mv], [pv])
+
+    def update_many(self, mv, pv):
+        """
+        Add samples in vectorized blocks; the result equals adding them one by one.
+        Samples with a missing MV, PV or previous PV value are skipped.
+        """
+        mv, pv = np.asarray(mv, dtype=float), np.asarray(pv, dtype=float)
+        for begin in range(0, len(pv), UPDATE_BLOCK):
+            self._update_block(mv[begin:begin + UPDATE_BLOCK], pv[begin:begin + UPDATE_BLOCK])
+
+    def _update_block(self, mv, pv):
+        count = len(pv)
+        history = len(self.mv_history)
+        u = np.concatenate((self.mv_history, mv))
+        lagged = u[history - 1 - self.delays[None, :] + np.arange(count)[:, None]]  # u[n-1-d], shape (n, bank)
+        y_previous = np.broadcast_to(np.concatenate(([self.pv], pv[:-1]))[:, None], lagged.shape)
+        phi = np.stack((y_previous, lagged, np.ones_like(lagged)), axis=2)
+        valid = np.isfinite(phi).all(axis=2) & np.isfinite(pv)[:, None]
+        phi = np.where(valid[:, :, None], phi, 0.0)
+        y = np.where(valid, pv[:, None], 0.0)
+
+        weights = self.forgetting ** np.arange(count - 1, -1, -1)
+        decay = self.forgetting ** count
+        columns = phi.transpose(1, 2, 0)  # (bank, 3, n)
+        self.moments = decay * self.moments + (columns * weights) @ columns.transpose(0, 2, 1)
+        self.cross = decay * self.cross + np.einsum("n,nbi,nb->bi", weights, phi, y)
+        self.energy = decay * self.energy + weights @ y ** 2
+        self.mv_history = u[-history:]
+        self.pv = pv[-1]
+        self.count += count
+
+    def model(self):
+        """
+        Current (K, tau [s], T [s]) of the best bank member; NaN while the estimate is not a stable lag.
+        """
+        ridge = (RIDGE * np.trace(self.moments, axis1=1, axis2=2) + 1e-12)[:, None, None] * np.eye(3)
+        theta = np.linalg.solve(self.moments + ridge, self.cross[:, :, None])[:, :, 0]
+        residual = self.energy - np.einsum("bi,bi->b", theta, self.cross)
+        best = int(np.argmin(residual))
+        a, b, _ = theta[best]
+        if not 0 < a < 1:
+            return np.nan, np.nan, np.nan
+        return float(b / (1 - a)), float(self.delays[best] * self.dt), float(-self.dt / np.log(a))
+
+    def pid_object(self, method=None, pid=0, **options):
+        """
+        PID_Object of the current model, with settings of `method` calculated if given.
+        `options` are method settings such as overshoot and disturbance (see TuningMethod.options).
+        """
+        k_ob, tau_ob, t1_ob = self.model()
+        obj = PID_Object("1st Order", k_ob, tau_ob, t1_ob)
+        obj.pid = pid
+        obj.method = method
+        for option, value in options.items():
+            setattr(obj, option, value)
+        if method is not None and np.isfinite(k_ob):
+            try:
+                obj.calculate_pid()
+            except ArithmeticError:
+                pass
+        return obj
+
+
+def track_file(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format, mv, pv,
+               dt, method=None, pid=0, max_delay=MAX_DELAY, forgetting=FORGETTING, report_every=REPORT_EVERY,
+               chunk_rows=CHUNK_ROWS):
+    """
+    One streaming pass of RecursiveEstimator over a historian .csv (memory bounded by `chunk_rows`).
+    Yields a row (time, k_ob, tau_ob, t1_ob, p_pid, i_pid, d_pid) every `report_every` samples;
+    PID settings are calculated with `method` for PID type `pid` (0 - PI, 1 - PID).
+    """
+    estimator = RecursiveEstimator(dt, max_delay, forgetting)
+    for chunk in iter_chunks(source, separator, decimal_sep, header_row, skip_rows, skip_columns, date_format,
+                             [mv, pv], chunk_rows):
+        mv_values, pv_values = chunk[mv].to_numpy(dtype=float), chunk[pv].to_numpy(dtype=float)
+        begin = 0
+        while begin < len(chunk):
+            end = min(begin + report_every - estimator.count % report_every, len(chunk))
+            estimator.update_many(mv_values[begin:end], pv_values[begin:end])
+            if estimator.count % report_every == 0:
+                obj = estimator.pid_object(method, pid)
+                yield {"time": chunk.index[end - 1], "k_ob": obj.k_ob, "tau_ob": obj.tau_ob, "t1_ob": obj.t1_ob,
+                       "p_pid": obj.p_pid, "i_pid": obj.i_pid, "d_pid": obj.d_pid}
+            begin = end
+
+
+def track_frame(*args, **kwargs):
+    """
+    track_file collected into a DataFrame indexed by time.
+    """
+    return pd.DataFrame(track_file(*args, **kwargs)).set_index("time")
@@ -0,0 +1,100 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .Frequency import max_sensitivity
+from .Methods import BATCH_METHODS, calculate_pid_batch
+from .Models import ProcessModel, TuningResult
+from .PID_Classes import TuningRequest, tune
+from .Simulation import parallel_gains, simulate_batch, time_grid
+
+UNCERTAINTY = 0.2  # relative standard deviation of each model parameter
+SAMPLES = 10_000
+QUANTILES = [0.05, 0.5, 0.95]
+
+
+@dataclass(frozen=True)
+class RobustnessResult:
+    k_ob: np.ndarray  # perturbed models, shape (samples,)
+    tau_ob: np.ndarray
+    t1_ob: np.ndarray
+    t2_ob: np.ndarray | None
+    p_pid: np.ndarray  # settings of the tuning rule for each perturbed model
+    i_pid: np.ndarray
+    d_pid: np.ndarray
+    nominal: tuple  # (P, I, D) of the nominal model, applied to every perturbed plant below
+    overshoot: np.ndarray  # %
+    iae: np.ndarray
+    ms: np.ndarray  # maximum sensitivity, inf if unstable
+    stable: np.ndarray
+
+
+def perturb_models(k_ob, tau_ob, t1_ob, t2_ob=None, uncertainty=UNCERTAINTY, samples=SAMPLES, seed=None):
+    """
+    `samples` models around the nominal one, each parameter multiplied by e^(uncertainty N(0, 1)) so it stays positive.
+    Returns arrays (k_ob, tau_ob, t1_ob, t2_ob), t2_ob None for a 1st order model.
+    """
+    factors = np.exp(uncertainty * np.random.default_rng(seed).standard_normal((4, samples)))
+    return (k_ob * factors[0], tau_ob * factors[1], t1_ob * factors[2],
+            None if t2_ob is None else t2_ob * factors[3])
+
+
+def _robustness_chunk(args):
+    model, gains, dt, horizon = args
+    result = simulate_batch(*model, *gains, dt=dt, horizon=horizon, record=False)
+    ms = np.where(result.stable, max_sensitivity(*model, *gains), np.inf)
+    return np.stack((result.overshoot, result.iae, ms, result.stable))
+
+
+def robustness_analysis(method, order, k_ob, tau_ob, t1_ob, t2_ob=None, pid=0, overshoot=0, disturbance=0, lamb=3.0,
+                        uncertainty=UNCERTAINTY, samples=SAMPLES, seed=None, workers=1):
+    """
+    Monte Carlo over model uncertainty for tuning `method`: perturb the model (see perturb_models), run the rule
+    on every perturbed model with calculate_pid_batch, and simulate the nominal settings (as PID_Object.calculate_pid
+    gives them) in closed loop with every perturbed plant. Simulations are split across `workers` processes
+    (None - all cores, 1 runs in-process).
+    """
+    t2_ob = t2_ob if order != "1st Order" else None
+    models = perturb_models(k_ob, tau_ob, t1_ob, t2_ob, uncertainty, samples, seed)
+    if method in BATCH_METHODS:
+        p, i, d = calculate_pid_batch(method, order, *models, pid, overshoot, disturbance, lamb)
+    else:  # no vectorized form (Optimized): settings for the perturbed models are not computed
+        p = i = d = np.full(samples, np.nan)
+    # nominal settings as the page shows them (PID_Object.calculate_pid), not masked by the validity range
+    try:
+        result = tune(TuningRequest.from_model(ProcessModel(order, k_ob, tau_ob, t1_ob, t2_ob), pid, method, overshoot,
+                                               disturbance, lamb))
+    except ArithmeticError:
+        result = TuningResult(None, None)
+    nominal = tuple(np.nan if value is None else float(value)
+                    for value in (result.p_pid, result.i_pid, result.d_pid if pid == 1 else None))
+    kp, ki, kd = parallel_gains(*nominal[:2], nominal[2] if pid == 1 else None)
+    dt, horizon = time_grid(models[1], models[2], models[3])
+
+    workers = min(workers or os.cpu_count() or 1, samples)
+    parts = [[None] * workers if value is None else np.array_split(value, workers) for value in models]
+    chunks = [(model, (kp, ki, kd), dt, horizon) for model in zip(*parts)]
+    if workers == 1:
+        results = list(map(_robustness_chunk, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_robustness_chunk, chunks))
+    overshoots, iae, ms, stable = np.concatenate(results, axis=1)
+    return RobustnessResult(k_ob=models[0], tau_ob=models[1], t1_ob=models[2], t2_ob=models[3], p_pid=p, i_pid=i,
+                            d_pid=d, nominal=nominal, overshoot=overshoots, iae=iae, ms=ms, stable=stable.astype(bool))
+
+
+def summarize_robustness(result):
+    """
+    5%, 50% and 95% quantiles of the closed-loop indices of the nominal settings (inf where loops went unstable)
+    and of the settings the rule gives for the perturbed models.
+    """
+    closed_loop = {"Overshoot [%]": result.overshoot, "IAE": result.iae, "Ms": result.ms}
+    settings = {"P": result.p_pid, "I [s]": result.i_pid, "D [s]": result.d_pid}
+    table = {name: np.quantile(values, QUANTILES, method="nearest") for name, values in closed_loop.items()}
+    table.update({name: np.nanquantile(values, QUANTILES) if np.isfinite(values).any() else np.full(3, np.nan)
+                  for name, values in settings.items()})
+    return pd.DataFrame(table, index=pd.Index([f"{round(100 * q)}%" for q in QUANTILES], name="Quantile"))
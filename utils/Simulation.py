@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+PID_FORMS = {"Standard form (Siemens, Honeywell, Emerson, ABB)": "standard",
+             "Yokogawa CENTUM VP/CS3000": "yokogawa",
+             "Parallel form": "parallel"}  # page labels: short names
+
+SAMPLES_PER_LAG = 20  # simulation steps per smallest time constant (or dead time)
+MAX_STEPS = 4000
+HORIZON = 10  # each phase (setpoint, load) lasts this many (tau + T1 + T2)
+DERIVATIVE_FILTER = 10  # derivative filter time constant = D / DERIVATIVE_FILTER
+SETTLING_BAND = 0.02
+UNSTABLE = 1e6  # |PV| above this many setpoint/load sizes counts as unstable
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    t: np.ndarray  # [s], shape (steps,)
+    y: np.ndarray | None  # PV, shape (models, steps), None if not recorded
+    u: np.ndarray | None  # MV, shape (models, steps), None if not recorded
+    load_time: float
+    iae: np.ndarray
+    ise: np.ndarray
+    itae: np.ndarray
+    overshoot: np.ndarray  # % of setpoint step
+    settling_time: np.ndarray  # [s] into the 2% band after setpoint step, inf if never settled
+    load_iae: np.ndarray
+    stable: np.ndarray
+
+
+def parallel_gains(p, i, d=None, form="standard"):
+    """
+    (Kp, Ki, Kd) of the parallel form from controller settings given in `form`:
+    standard P (gain), I [s], D [s]; yokogawa P (proportional band, %), I [s], D [s]; parallel Kp, Ki [1/s], Kd [s].
+    """
+    p, i = np.asarray(p, dtype=float), np.asarray(i, dtype=float)
+    d = np.zeros_like(p) if d is None else np.nan_to_num(np.asarray(d, dtype=float))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if form == "parallel":
+            return p, i, d
+        kp = 100 / p if form == "yokogawa" else p
+        return kp, kp / i, kp * d
+
+
+def time_grid(tau_ob, t1_ob, t2_ob=None, horizon=None):
+    """
+    Default (dt [s], horizon [s]) of simulate_batch for the given models: SAMPLES_PER_LAG steps per smallest lag,
+    HORIZON x (tau + T1 + T2) of the slowest model per phase, at most MAX_STEPS steps.
+    """
+    tau, t1 = np.atleast_1d(np.asarray(tau_ob, dtype=float)), np.atleast_1d(np.asarray(t1_ob, dtype=float))
+    t2 = np.zeros_like(t1) if t2_ob is None else np.nan_to_num(np.atleast_1d(np.asarray(t2_ob, dtype=float)))
+    lags = np.concatenate((tau[tau > 0], t1[t1 > 0], t2[t2 > 0]))
+    if horizon is None:
+        horizon = 2 * HORIZON * np.max(tau + t1 + t2)
+    return max(np.min(lags) / SAMPLES_PER_LAG if len(lags) else 1.0, horizon / MAX_STEPS), horizon
+
+
+def simulate_batch(k_ob, tau_ob, t1_ob, t2_ob, kp, ki, kd, setpoint=1.0, load=1.0, dt=None, horizon=None,
+                   record=True):
+    """
+    Discrete-time closed loop of parallel PID (derivative on PV, filtered) and process model
+    K e^(-tau s) / ((T1 s + 1)(T2 s + 1)) for every element of the (broadcast) parameter arrays at once.
+    Setpoint step at t = 0, load step at the plant input halfway through; dead time is a ring buffer of MV samples.
+    T2 of NaN, 0 or None gives a 1st order model.
+    """
+    k, tau, t1, kp, ki, kd = np.broadcast_arrays(*(np.atleast_1d(np.asarray(value, dtype=float))
+                                                   for value in (k_ob, tau_ob, t1_ob, kp, ki, kd)))
+    t2 = np.zeros_like(t1) if t2_ob is None else np.nan_to_num(np.broadcast_to(np.asarray(t2_ob, dtype=float),
+                                                                                t1.shape))
+    n = t1.size
+    k, tau, t1, t2, kp, ki, kd = (value.reshape(n) for value in (k, tau, t1, t2, kp, ki, kd))
+
+    grid_dt, horizon = time_grid(tau, t1, t2, horizon)
+    phase = horizon / 2
+    dt = grid_dt if dt is None else dt
+    steps = int(np.ceil(2 * phase / dt))
+    load_step = steps // 2
+
+    a1 = np.exp(-dt / np.where(t1 > 0, t1, np.inf))
+    a2 = np.exp(-dt / np.where(t2 > 0, t2, np.inf)) * (t2 > 0)
+    delay = np.rint(tau / dt).astype(int)
+    buffer = np.zeros((n, delay.max() + 1))
+    rows = np.arange(n)
+    tf = np.where(kp != 0, np.abs(kd / np.where(kp != 0, kp, 1)) / DERIVATIVE_FILTER, 0.0)
+
+    x1 = np.zeros(n)
+    y = y_previous = np.zeros(n)
+    integral = np.zeros(n)
+    derivative = np.zeros(n)
+    iae, ise, itae, load_iae = np.zeros(n), np.zeros(n), np.zeros(n), np.zeros(n)
+    peak = np.full(n, -np.inf)
+    outside = np.zeros(n)
+    stable = np.ones(n, dtype=bool)
+    y_log = np.empty((n, steps)) if record else None
+    u_log = np.empty((n, steps)) if record else None
+    limit = UNSTABLE * max(abs(setpoint), abs(load), 1e-12)
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        for step in range(steps):
+            time = step * dt
+            error = setpoint - y
+            derivative = (tf * derivative - kd * (y - y_previous)) / (tf + dt)
+            y_previous = y
+            u = kp * error + integral + derivative
+            integral = integral + ki * error * dt
+
+            buffer[:, step % buffer.shape[1]] = u + (load if step >= load_step else 0.0)
+            delayed = np.where(step >= delay, buffer[rows, (step - delay) % buffer.shape[1]], 0.0)
+            x1 = a1 * x1 + (1 - a1) * k * delayed
+            y = np.where(t2 > 0, a2 * y + (1 - a2) * x1, x1)
+
+            if step < load_step:
+                iae += np.abs(error) * dt
+                ise += error ** 2 * dt
+                itae += time * np.abs(error) * dt
+                peak = np.maximum(peak, y)
+                outside = np.where(np.abs(error) > SETTLING_BAND * abs(setpoint), time + dt, outside)
+            else:
+                load_iae += np.abs(error) * dt
+            stable &= np.abs(y) < limit
+            if record:
+                y_log[:, step] = y
+                u_log[:, step] = u
+
+    unstable = ~stable
+    overshoot = np.maximum(peak - setpoint, 0) / abs(setpoint) * 100 if setpoint else np.zeros(n)
+    settling = np.where(outside >= load_step * dt, np.inf, outside)
+    for metric in (iae, ise, itae, load_iae, overshoot, settling):
+        metric[unstable | ~np.isfinite(metric)] = np.inf
+    return SimulationResult(t=np.arange(steps) * dt, y=y_log, u=u_log, load_time=load_step * dt, iae=iae, ise=ise,
+                            itae=itae, overshoot=overshoot, settling_time=settling, load_iae=load_iae, stable=stable)
+
+
+def simulate(obj, p=None, i=None, d=None, form="standard", **kwargs):
+    """
+    Closed-loop response of PID_Object `obj` (its model and, unless given, its standard form P/I/D).
+    """
+    if p is None:
+        p, i, d = obj.p_pid, obj.i_pid, obj.d_pid if obj.pid == 1 else None
+    kp, ki, kd = parallel_gains(p, i, d, form)
+    t2 = obj.t2_ob if obj.order != "1st Order" else None
+    return simulate_batch(obj.k_ob, obj.tau_ob, obj.t1_ob, t2, kp, ki, kd, **kwargs)
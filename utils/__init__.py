@@ -1 +1,19 @@
-from .PID_Classes import PID_Object
+from .Methods import (BATCH_METHODS, METHOD_VARIANTS, METHODS, TUNING_METHODS, TuningMethod, calculate_methods_batch,
+                      calculate_pid_batch)
+from .PID_Classes import PID_Object, TuningRequest, tune, tuning_cache
+from .Models import ModelArray, ProcessModel, TuningResult
+from .Data_Loader import (frame_stats, get_data, iter_chunks, parse_datetime, read_columns, read_window,
+                          sample_interval)
+from .Model_Response import step_input, step_response
+from .Identification import FitResult, estimate_dead_time, fit_model
+from .Batch_Identification import find_steps, identify_steps, summarize_steps
+from .Simulation import PID_FORMS, SimulationResult, parallel_gains, simulate, simulate_batch, time_grid
+from .Comparison import DISTURBANCE_TYPES, INDICES, OPTION_MENUS, PROCESS_TYPES, compare_methods
+from .Decimation import CHART_POINTS, chart_positions
+from .Data_Source import CsvReplay, DataSource, LiveIdentification, RingBuffer, SimulatedPlant
+from .Recursive_Estimation import RecursiveEstimator, track_file, track_frame
+from .Preprocessing import FILTER_WINDOW, FILTERS, clip_outliers, filter_values, preprocess, resample_uniform
+from .Robustness import RobustnessResult, perturb_models, robustness_analysis, summarize_robustness
+from .Frequency import (StabilityMargins, frequency_grid, frequency_response, loop_margins, max_sensitivity, open_loop,
+                        stability_margins)
+from .Optimization import CRITERIA, MS_LIMIT, optimization_cache, optimize_pid